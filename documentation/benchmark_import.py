@@ -0,0 +1,46 @@
+# Tracks the cold start latency of importing the package and of the first determinant
+import subprocess
+import sys
+import numpy as np
+
+REPEATS = 10
+HEAVY_MODULES = ["sympy", "matplotlib.pyplot", "scipy.optimize"]
+
+import_script = """
+import time
+start = time.perf_counter()
+import acoustic_analyser
+print(time.perf_counter() - start)
+"""
+
+first_determinant_script = """
+import time
+start = time.perf_counter()
+from acoustic_analyser import frame
+test_frame = frame.from_file(member_file="test_member.json", constraint_file="test_constraint.csv")
+test_frame.fixed_end(member_id=0)
+test_frame.free_end(member_id=1)
+test_frame.get_determinant(w=100)
+print(time.perf_counter() - start)
+"""
+
+heavy_modules_script = f"""
+import sys
+import acoustic_analyser
+print([module for module in {HEAVY_MODULES} if module in sys.modules])
+"""
+
+
+def run(script: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+import_times = [float(run(import_script)) for _ in range(REPEATS)]
+print(f"Import: median {np.median(import_times) * 1000:.1f} ms over {REPEATS} runs")
+
+first_times = [float(run(first_determinant_script)) for _ in range(REPEATS)]
+print(f"Import to first determinant: median {np.median(first_times) * 1000:.1f} ms")
+
+print(f"Heavy modules loaded on import: {run(heavy_modules_script)}")
@@ -3,7 +3,10 @@ import sympy
 from sympy.parsing.mathematica import parse_mathematica as parse
 from sympy import I, sin, cos, tan
 import pickle
-from typing import Tuple
+import inspect
+import json
+import numpy as np
+from typing import Dict, List, Tuple
 import logging
 
 #%%
@@ -105,6 +108,39 @@ def get_equation_two_member() -> Tuple[sympy.Matrix]:
     return matrices
 
 
+def get_numeric_equations(
+    two_member: List[sympy.Matrix],
+    free_end: sympy.Matrix,
+    fixed_end: sympy.Matrix,
+) -> Dict:
+    """Gets a lightweight numeric form of the equations that can be loaded without SymPy.
+    The entries of M1-M6 and N1-N6, and their derivatives with respect to omega, are stored as the source of vectorised numpy functions
+    and the boundary condition matrices as their real and imaginary parts
+    """
+    arguments = sympy.symbols(
+        "density1, area1, E1, I1, L1, H1, density2, area2, E2, I2, L2, H2, theta, w"
+    )
+    entries = [entry for matrix in two_member for entry in matrix]
+    kernel = sympy.lambdify(arguments, entries, modules="numpy", cse=True)
+    # Derivatives of the entries with respect to omega, used for the derivative of the R/T matrices
+    derivatives = [sympy.diff(entry, arguments[-1]) for entry in entries]
+    derivative_kernel = sympy.lambdify(arguments, derivatives, modules="numpy", cse=True)
+
+    def to_parts(matrix: sympy.Matrix) -> List[List[List[float]]]:
+        array = np.array(matrix, dtype=complex)
+        return [array.real.tolist(), array.imag.tolist()]
+
+    return {
+        "two_member": {
+            "arguments": [str(argument) for argument in arguments],
+            "source": inspect.getsource(kernel),
+            "derivative_source": inspect.getsource(derivative_kernel),
+        },
+        "free_end": to_parts(free_end),
+        "fixed_end": to_parts(fixed_end),
+    }
+
+
 if __name__ == "__main__":
     obj = get_equation_two_member()
     filehandler = open("equations/two_member.pkl", "wb")
@@ -123,3 +159,13 @@ if __name__ == "__main__":
     pickle.dump(obj, filehandler)
     filehandler.close()
     logger.debug("fixed_end generated")
+
+    obj = get_numeric_equations(
+        two_member=get_equation_two_member(),
+        free_end=get_equation_free_end(),
+        fixed_end=get_equation_fixed_end(),
+    )
+    filehandler = open("equations/numeric.json", "w")
+    json.dump(obj, filehandler)
+    filehandler.close()
+    logger.debug("numeric equations generated")
@@ -2,24 +2,82 @@ from acoustic_analyser.modules import joint, bc
 from acoustic_analyser.modules.bc import bc as bc_type
 from acoustic_analyser.modules.bc import fixed_end as fixed_end_type
 from acoustic_analyser.modules.joint import joint as joint_type
-from sympy.core.add import Add as equation_type
-from sympy import symbols, Matrix
 from acoustic_analyser.modules.member import member as member_type
-from json import load as json_load
-from csv import reader as csv_load
+from acoustic_analyser.modules.member import member_store, PROPERTIES
+from acoustic_analyser.modules.assembly import assembler
+from acoustic_analyser.modules.chain import chain, get_chain_order
+from acoustic_analyser.modules.cache import lru_cache
+from acoustic_analyser.modules.disk_cache import disk_cache
+from acoustic_analyser.modules.instrumentation import stage_timer, debug_lazy
+from acoustic_analyser.modules.parallel import (
+    get_determinants_parallel,
+    run_study_parallel,
+)
+from acoustic_analyser.modules.parametric import get_points, run_study
+from acoustic_analyser.modules.continuation import run_continuation
+from acoustic_analyser.modules.forced import (
+    get_load_vectors,
+    get_displacements,
+    solve_forced,
+    solve_forced_sparse,
+)
+from acoustic_analyser.modules.sinks import sink
+from acoustic_analyser.modules.loaders import (
+    iter_member_records,
+    load_edges,
+    get_unique_edges,
+)
+from acoustic_analyser.modules.scaling import (
+    OBJECTIVES,
+    get_log_determinant,
+    get_objective,
+)
+from acoustic_analyser.modules.null_space import get_null_space
+from acoustic_analyser.modules.sparse import (
+    get_sparse_log_determinant,
+    get_sparse_singular_indicator,
+)
+from acoustic_analyser.modules.roots import (
+    root_finder,
+    is_phase_flip,
+    is_minimum,
+    newton_refine,
+)
 import logging
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 import numpy as np
-from matplotlib import pyplot as plt
-from scipy.optimize import newton
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s:%(message)s"
-)
+# matplotlib, SymPy and scipy.optimize are imported where they are used to keep the import of the package light
 logger = logging.getLogger("acoustic_analyser")
 
+# Memory budget of a chunk of stacked coefficient matrices, from which the default chunk size is derived
+CHUNK_BYTES = 2**28
+# Temporary copies of the stack made while it is evaluated, e.g. by equilibrate, the SVD or LAPACK
+MATRIX_COPIES = 4
+# Default chunk size of the condensed chain, whose memory does not grow with the size of the frame
+CHAIN_CHUNK_SIZE = 64
+
+
+def _set_debug_logging(debug: bool) -> None:
+    """Sets the level of the package logger, a handler is only attached when debugging"""
+    if debug:
+        logger.setLevel(logging.DEBUG)
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(
+                logging.Formatter("%(asctime)s %(name)s %(levelname)s:%(message)s")
+            )
+            logger.addHandler(handler)
+    else:
+        logger.setLevel(logging.INFO)
+
+
+def get_omega(freq: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+    """Converts a frequency in Hz to omega"""
+    return freq * np.pi * 2
 
-def get_coefficient_matrix(eqns: equation_type, params: list) -> Matrix:
+
+def get_coefficient_matrix(eqns, params: list) -> np.ndarray:
     """This is intended to extract the coefficients from eqns and build a matrix"""
     coeff_list = []
     for eqn in eqns:
@@ -31,49 +89,156 @@ def get_coefficient_matrix(eqns: equation_type, params: list) -> Matrix:
     return np.array(coeff_list)
 
 
+def plot_mode_shape(
+    mode_shape_positive: np.ndarray,
+    mode_shape_negative: np.ndarray,
+    original_shape: np.ndarray,
+) -> None:
+    """Plots a mode shape over the original shape of the frame on the current figure"""
+    from matplotlib import pyplot as plt
+
+    plt.plot(mode_shape_positive[:, 0], mode_shape_positive[:, 1], "b")
+    plt.plot(original_shape[:, 0], original_shape[:, 1], "r--")
+    plt.plot(mode_shape_negative[:, 0], mode_shape_negative[:, 1], "b")
+    plt.legend(["Mode Shape", "Original Shape"])
+    plt.xticks([])
+    plt.yticks([])
+
+
+def plot_frequency_response(freq: np.ndarray, output: np.ndarray) -> None:
+    """Plots the real and imaginary components of the determinant and then its absolute value in a new figure"""
+    from matplotlib import pyplot as plt
+
+    plt.plot(freq, np.real(output))
+    plt.plot(freq, np.imag(output))
+    plt.plot([freq[0], freq[-1]], [0, 0], "--")
+    plt.legend(["Real", "Imaginary"])
+    plt.show()
+    plt.figure()
+    plt.plot(freq, np.abs(output))
+    plt.legend(["Abs"])
+    plt.show()
+
+
 class frame:
     """This class emulates a mechanical frame consisting of joints and members
     It is the class the user directly interacts with
     """
 
-    def __init__(self, debug: bool = False) -> None:
-        if debug:
-            logger.setLevel(logging.DEBUG)
-        else:
-            logger.setLevel(logging.INFO)
+    def __init__(
+        self,
+        debug: bool = False,
+        cache_size: int = 256,
+        sparse: bool = False,
+        cache_dir: str = None,
+        cache_max_bytes: int = 2**30,
+    ) -> None:
+        """If sparse is set, determinants come from a sparse LU of the coefficient matrix instead of the dense one,
+        which scales to frames with hundreds of members.
+        If cache_dir is given, the joint R/T matrices are also cached on disk there, shared across runs and processes
+        and kept below cache_max_bytes
+        """
+        _set_debug_logging(debug)
         self.debug = debug
+        self.sparse = sparse
+        self.disk_cache = None
+        if cache_dir is not None:
+            self.disk_cache = disk_cache(directory=cache_dir, max_bytes=cache_max_bytes)
         self.members: Dict[int, member_type] = {}
+        self.member_store = member_store()
         self.constraints: Dict[int, Union[bc_type, joint_type]] = {}
         self.constraints_count = -1
-        self.omega = symbols("w")
+        self._omega = None
+        self.assembler = None
+        self.chain = None
+        self.chain_checked = False
+        self.topology_version = 0
+        self.cache = lru_cache(max_size=cache_size)
+        # Matrices at the natural frequencies, kept apart so that evaluations during later searches do not evict them
+        self.root_cache = lru_cache(max_size=cache_size)
+        self.timer = stage_timer()
+
+    @property
+    def omega(self):
+        """Symbol of omega, SymPy is only imported when it is first used"""
+        if self._omega is None:
+            from sympy import symbols
+
+            self._omega = symbols("w")
+        return self._omega
 
     @classmethod
     def from_file(cls, member_file: str, constraint_file: str, debug: bool = False):
-        """Defines a frame from a constraint file and a member file."""
+        """Defines a frame from a constraint file and a member file.
+        Members are read from JSON, NDJSON or npz and joints from a dense CSV matrix, an edge list CSV or npz, see modules.loaders.
+        Joints repeated between the same members are skipped, unless their angles differ which raises a ValueError
+        """
         obj = cls(debug)
 
-        with open(member_file, "r") as jsonfile:
-            member_dict = json_load(jsonfile)
-            counter = 0
-            for member_id, member_deets in member_dict.items():
-                assert int(member_id) == counter, "ID format is not followed"
-                obj.add_member(id=int(member_id), **member_deets)
-                counter = counter + 1
+        for member_id, member_deets in iter_member_records(member_file):
+            obj.add_member(id=member_id, **member_deets)
         logger.debug("Created all Members")
-        with open(constraint_file, "r") as csvfile:
-            constraints = csv_load(csvfile)
-            for m1_id, row in enumerate(constraints):
-                for m2_id, val in enumerate(row):
-                    if int(val) == -1:
-                        continue
-                    # For >2 member joints, we can add a condition to check how many joints are there and appropriately select function
-                    obj.two_member_joint(
-                        theta=float(val), member_1_id=int(m1_id), member_2_id=int(m2_id)
-                    )
+
+        member_1_ids, member_2_ids, theta = get_unique_edges(
+            *load_edges(constraint_file)
+        )
+        # For >2 member joints, we can add a condition to check how many joints are there and appropriately select function
+        for m1_id, m2_id, val in zip(
+            member_1_ids.tolist(), member_2_ids.tolist(), theta.tolist()
+        ):
+            obj.two_member_joint(theta=val, member_1_id=m1_id, member_2_id=m2_id)
         logger.debug("Added all Constraints")
 
         return obj
 
+    def get_description(self) -> Dict:
+        """Gives a compact picklable description of the frame from which it can be rebuilt"""
+        members = {}
+        for member_id, member in self.members.items():
+            members[member_id] = {name: getattr(member, name) for name in PROPERTIES}
+        constraints = []
+        for constraint in self.constraints.values():
+            member_ids = [member.id for member in constraint.members]
+            constraints.append(
+                {
+                    "type": type(constraint).__name__,
+                    "member_ids": member_ids,
+                    "theta": constraint.theta,
+                }
+            )
+        description = {
+            "members": members,
+            "constraints": constraints,
+            "sparse": self.sparse,
+        }
+        if self.disk_cache is not None:
+            description["cache_dir"] = self.disk_cache.directory
+            description["cache_max_bytes"] = self.disk_cache.max_bytes
+        return description
+
+    @classmethod
+    def from_description(cls, description: Dict, debug: bool = False):
+        """Defines a frame from the description given by get_description"""
+        obj = cls(
+            debug,
+            sparse=description.get("sparse", False),
+            cache_dir=description.get("cache_dir"),
+            cache_max_bytes=description.get("cache_max_bytes", 2**30),
+        )
+        for member_id, member_deets in description["members"].items():
+            obj.add_member(id=member_id, **member_deets)
+        for constraint in description["constraints"]:
+            member_ids = constraint["member_ids"]
+            if constraint["type"] == "two_member":
+                constraint_obj = obj.two_member_joint(
+                    theta=0, member_1_id=member_ids[0], member_2_id=member_ids[1]
+                )
+                # theta is kept in radians to rebuild the joint exactly
+                constraint_obj.theta = constraint["theta"]
+            else:
+                getattr(obj, constraint["type"])(member_id=member_ids[0])
+        return obj
+
     def add_member(
         self,
         length: float,
@@ -91,12 +256,13 @@ class frame:
             youngs_modulus=youngs_modulus,
             cross_section_area=cross_section_area,
             inertia=inertia,
-            omega=self.omega,
             height=height,
             id=id,
+            store=self.member_store,
         )
         self.members[id] = member_obj
-        logger.debug(f"Member added with id {id}")
+        self._set_structure_changed()
+        logger.debug("Member added with id %s", id)
         return member_obj
 
     def _add_constraint(func):
@@ -106,8 +272,11 @@ class frame:
 
         def inner1(self, *args, **kwargs):
             constraint_obj = func(self, *args, **kwargs)
+            if isinstance(constraint_obj, joint_type):
+                constraint_obj.disk_cache = self.disk_cache
             self.constraints[self._get_constraint_id()] = constraint_obj
             self.constraints_count = self.constraints_count + 1
+            self._set_structure_changed()
             return constraint_obj
 
         return inner1
@@ -124,14 +293,14 @@ class frame:
     def free_end(self, member_id: int) -> bc:
         id = self._get_constraint_id()
         free_end_obj = bc.free_end(member=self.members[member_id], id=id)
-        logger.debug(f"Free End added to member {member_id} with id {id}")
+        logger.debug("Free End added to member %s with id %s", member_id, id)
         return free_end_obj
 
     @_add_constraint
     def fixed_end(self, member_id: int) -> bc:
         id = self._get_constraint_id()
         fixed_end_obj = bc.fixed_end(member=self.members[member_id], id=id)
-        logger.debug(f"Fixed End added to member {member_id} with id {id}")
+        logger.debug("Fixed End added to member %s with id %s", member_id, id)
         return fixed_end_obj
 
     @_add_constraint
@@ -146,7 +315,10 @@ class frame:
             id=id,
         )
         logger.debug(
-            f"Two member joint added b/w {member_1_id} and {member_2_id} with id {id}"
+            "Two member joint added b/w %s and %s with id %s",
+            member_1_id,
+            member_2_id,
+            id,
         )
         return rigid_joint_obj
 
@@ -155,10 +327,95 @@ class frame:
         for member in self.members.values():
             self.params.extend(member.get_all_parameters())
 
-    def get_equation_matrix(self, w: float):
-        """This function is responsible for collecting the equations from the constraints and constructing the desired matrix from them"""
-        self._set_params()
+    def _set_structure_changed(self) -> None:
+        """Invalidates everything that depends on the topology"""
+        self.assembler = None
+        self.chain = None
+        self.chain_checked = False
+        self.topology_version = self.topology_version + 1
+        self.cache.clear()
+        self.root_cache.clear()
+
+    def _get_state(self) -> tuple:
+        """Key of the current state of the frame used by the cache.
+        Along with the topology version it holds the properties, so in place changes such as joint.theta are respected
+        """
+        properties = [self.topology_version, self.member_store.get_state()]
+        for constraint in self.constraints.values():
+            properties.append(constraint.theta)
+        return tuple(properties)
+
+    def get_cache_info(self) -> Dict:
+        """Returns the hits, misses and size of the cache of matrices, R/T blocks and determinants,
+        along with those of the matrices kept at the natural frequencies and of the disk cache if there is one
+        """
+        info = self.cache.get_info()
+        info["roots"] = self.root_cache.get_info()
+        if self.disk_cache is not None:
+            info["disk"] = self.disk_cache.get_info()
+        return info
+
+    def stats(self) -> Dict[str, Dict]:
+        """Returns the time spent in each stage (assembly, rt_solve, coefficient_extraction, determinant) and the cache counters.
+        rt_solve is part of assembly
+        """
+        return {"stages": self.timer.get_stats(), "cache": self.get_cache_info()}
+
+    def reset_stats(self) -> None:
+        self.timer.reset()
 
+    def _get_assembler(self) -> assembler:
+        """Freezes the topology by computing the layout of the coefficient matrix, it is recomputed whenever the structure changes"""
+        if self.assembler is None:
+            self.assembler = assembler(
+                members=self.members, constraints=self.constraints, timer=self.timer
+            )
+        return self.assembler
+
+    def _get_chunk_size(self, chunk_size: int = None, objective: str = "det") -> int:
+        """Gives chunk_size if it is set, else the number of omega whose N x N complex matrices fit in CHUNK_BYTES"""
+        if chunk_size is not None:
+            return chunk_size
+        if objective == "chain":
+            return CHAIN_CHUNK_SIZE
+        size = self._get_assembler().size
+        return max(1, CHUNK_BYTES // (16 * size * size * MATRIX_COPIES))
+
+    def _get_chain(self) -> chain:
+        """Gives the condensed evaluator if the frame is a serial chain, else None. It is recomputed whenever the structure changes"""
+        if not self.chain_checked:
+            order = get_chain_order(members=self.members, constraints=self.constraints)
+            if order is not None:
+                self.chain = chain(
+                    order=order, constraints=self.constraints, timer=self.timer
+                )
+            self.chain_checked = True
+            logger.debug("Frame is a serial chain: %s", self.chain is not None)
+        return self.chain
+
+    def get_equation_matrix(self, w: float, symbolic: bool = False):
+        """This function is responsible for collecting the equations from the constraints and constructing the desired matrix from them
+        By default the matrix is filled numerically, the symbolic path is kept as a reference for checking results
+        """
+        if not symbolic:
+            if np.ndim(w) > 0:
+                return self._get_assembler().assemble(w=w)
+            state = self._get_state()
+            key = ("matrix", float(w), state)
+            coeff_matrix = self.cache.get(key)
+            if coeff_matrix is None:
+                coeff_matrix = self._get_assembler().assemble(
+                    w=w, cache=self.cache, state=state
+                )
+                # The cached matrix is shared, so it is made read only
+                coeff_matrix.setflags(write=False)
+                self.cache.put(key, coeff_matrix)
+                logger.debug("Equation Coefficent Matrix assembled")
+            return coeff_matrix
+
+        from sympy import Matrix
+
+        self._set_params()
         eqns = Matrix([])
         for constraint in self.constraints.values():
             eqns = eqns.col_join(constraint.get_equations(w=w))
@@ -166,54 +423,549 @@ class frame:
             eqns = eqns.col_join(member.get_equations(w=w))
         logger.debug("All Equations Fetched")
         self.eqn_matrix = eqns
-        for eqn in eqns:
-            logger.debug(eqn.expand())
-        coeff_matrix = get_coefficient_matrix(eqns=eqns, params=self.params)
+        debug_lazy(lambda: "\n".join(str(eqn.expand()) for eqn in eqns))
+        with self.timer.time("coefficient_extraction"):
+            coeff_matrix = get_coefficient_matrix(eqns=eqns, params=self.params)
         logger.debug("Equation Coefficent Matrix generated")
         return coeff_matrix
 
-    def get_determinant(self, w: float, print_det: bool = False) -> complex:
-        """Returns the determinant of the A matrix given omega"""
-        det = np.linalg.det(self.get_equation_matrix(w=w))
+    def get_sparse_matrix(self, w: float):
+        """Returns the A matrix given omega as a scipy CSC matrix, it is cached for the current state of the frame"""
+        state = self._get_state()
+        key = ("sparse", float(w), state)
+        coeff_matrix = self.cache.get(key)
+        if coeff_matrix is None:
+            coeff_matrix = self._get_assembler().assemble_sparse(
+                w=w, cache=self.cache, state=state
+            )
+            self.cache.put(key, coeff_matrix)
+        return coeff_matrix
+
+    def get_determinant(
+        self, w: float, print_det: bool = False, objective: str = "det"
+    ) -> complex:
+        """Returns the determinant of the A matrix given omega, the determinant is cached for the current state of the frame.
+        objective selects what is evaluated: "det" the determinant or "svd" the conditioning indicator,
+        i.e. the ratio of the smallest to the largest singular value of the equilibrated matrix with the phase of the determinant.
+        The sparse backend only evaluates the determinant.
+        "chain" evaluates the condensed characteristic function of a serial chain instead, see modules.chain
+        """
+        if objective == "chain":
+            return self._get_chain_value(w=w, print_det=print_det)
+        if self.sparse and objective != "det":
+            raise ValueError("The sparse backend only supports the det objective")
+        key = ("det", objective, float(w), self._get_state())
+        det = self.cache.get(key)
+        if det is None:
+            if self.sparse:
+                coeff_matrix = self.get_sparse_matrix(w=w)
+                with self.timer.time("determinant"):
+                    sign, logdet = get_sparse_log_determinant(coeff_matrix)
+                    det = sign * np.exp(logdet)
+            else:
+                coeff_matrix = self.get_equation_matrix(w=w)
+                with self.timer.time("determinant"):
+                    det = get_objective(coeff_matrix, objective=objective)
+            self.cache.put(key, det)
         if print_det:
             print(f"Determinant: {det}")
         return det
 
+    def get_singular_indicator(self, w: float, estimate: bool = None) -> float:
+        """Returns the ratio of the smallest to the largest singular value of the equilibrated A matrix given omega.
+        Unlike the determinant it has a scale, from 0 at a natural frequency to 1, so it is used to confirm roots.
+        If estimate is set the ratio is estimated from a sparse LU of the matrix, which keeps the cost linear in the members,
+        otherwise it comes from a dense SVD. By default only the sparse backend estimates it
+        """
+        if estimate is None:
+            estimate = self.sparse
+        if estimate:
+            key = ("indicator", float(w), self._get_state())
+            indicator = self.cache.get(key)
+            if indicator is None:
+                indicator = get_sparse_singular_indicator(self.get_sparse_matrix(w=w))
+                self.cache.put(key, indicator)
+            return indicator
+        return np.abs(self.get_determinant(w=w, objective="svd"))
+
+    def _get_chain_value(self, w: float, print_det: bool = False) -> complex:
+        if self._get_chain() is None:
+            raise ValueError(
+                "The chain objective needs a frame which is a serial chain"
+            )
+        state = self._get_state()
+        key = ("chain", float(w), state)
+        value = self.cache.get(key)
+        if value is None:
+            value = self.chain.get_values(w=w, cache=self.cache, state=state)[0]
+            self.cache.put(key, value)
+        if print_det:
+            print(f"Determinant: {value}")
+        return value
+
+    def get_determinants(
+        self,
+        w: np.ndarray,
+        chunk_size: int = None,
+        log: bool = False,
+        objective: str = "det",
+    ) -> Union[np.ndarray, Tuple[np.ndarray]]:
+        """Returns the determinants of the A matrix for an array of omega.
+        The matrices are stacked and evaluated chunk_size at a time to keep the memory bounded, they are not cached.
+        By default chunk_size is derived from the CHUNK_BYTES memory budget and the size of the matrices.
+        If log is set, the sign and the log of the absolute value are returned as with np.linalg.slogdet,
+        computed on the equilibrated matrices so that large frames do not overflow or underflow,
+        which only applies to the "det" and "chain" objectives.
+        Otherwise objective selects what is evaluated, as in get_determinant.
+        The sparse backend factorises the matrices one at a time
+        """
+        if log and objective not in ["det", "chain"]:
+            raise ValueError("log is only supported for the det and chain objectives")
+        w = np.atleast_1d(np.asarray(w, dtype=float))
+        chunk_size = self._get_chunk_size(chunk_size, objective=objective)
+        if objective == "chain":
+            if self._get_chain() is None:
+                raise ValueError(
+                    "The chain objective needs a frame which is a serial chain"
+                )
+            det = np.empty(len(w), dtype=complex)
+            for start in range(0, len(w), chunk_size):
+                chunk = slice(start, start + chunk_size)
+                det[chunk] = self.chain.get_values(w=w[chunk])
+            if log:
+                return det / np.abs(det), np.log(np.abs(det))
+            return det
+        if self.sparse:
+            return self._get_sparse_determinants(w=w, log=log, objective=objective)
+        if log:
+            sign = np.empty(len(w), dtype=complex)
+            logdet = np.empty(len(w), dtype=float)
+        else:
+            det = np.empty(len(w), dtype=complex)
+
+        for start in range(0, len(w), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            coeff_matrices = self.get_equation_matrix(w=w[chunk])
+            with self.timer.time("determinant"):
+                if log:
+                    sign[chunk], logdet[chunk] = get_log_determinant(coeff_matrices)
+                else:
+                    det[chunk] = get_objective(coeff_matrices, objective=objective)
+            logger.debug(
+                "Determinants evaluated for %s/%s",
+                min(start + chunk_size, len(w)),
+                len(w),
+            )
+
+        if log:
+            return sign, logdet
+        return det
+
+    def _get_log_derivative(
+        self, w: np.ndarray, chunk_size: int = None, with_det: bool = False
+    ) -> Tuple[np.ndarray]:
+        """Gives the determinants, None unless with_det is set, and tr(A^-1 dA/dw) for an array of omega.
+        A is assembled once per chunk, with with_det each matrix is LU factorised once for both its determinant and the solve
+        """
+        if self.sparse:
+            raise ValueError("The sparse backend does not support the derivative")
+        w = np.atleast_1d(np.asarray(w, dtype=float))
+        assembler = self._get_assembler()
+        chunk_size = self._get_chunk_size(chunk_size)
+        det = np.empty(len(w), dtype=complex) if with_det else None
+        log_derivative = np.empty(len(w), dtype=complex)
+        for start in range(0, len(w), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            coeff_matrices = self.get_equation_matrix(w=w[chunk])
+            derivative_matrices = assembler.assemble_derivative(w=w[chunk])
+            with self.timer.time("determinant"):
+                if not with_det:
+                    log_derivative[chunk] = np.trace(
+                        np.linalg.solve(coeff_matrices, derivative_matrices),
+                        axis1=1,
+                        axis2=2,
+                    )
+                    continue
+                from scipy.linalg import lu_factor, lu_solve
+
+                for index, (coeff_matrix, derivative_matrix) in enumerate(
+                    zip(coeff_matrices, derivative_matrices), start=start
+                ):
+                    lu, pivots = lu_factor(coeff_matrix, check_finite=False)
+                    swaps = np.count_nonzero(pivots != np.arange(len(pivots)))
+                    det[index] = (-1) ** swaps * np.prod(np.diagonal(lu))
+                    log_derivative[index] = np.trace(
+                        lu_solve((lu, pivots), derivative_matrix, check_finite=False)
+                    )
+        return det, log_derivative
+
+    def get_log_derivative(self, w: np.ndarray, chunk_size: int = None) -> np.ndarray:
+        """Returns the derivative of the log of the determinant with respect to omega for an array of omega,
+        i.e. tr(A^-1 dA/dw) from one factorisation of A. dA/dw is assembled in closed form from the propagation
+        exponentials of the members and the derivatives of the joint kernels. The sparse backend is not supported
+        """
+        return self._get_log_derivative(w=w, chunk_size=chunk_size)[1]
+
+    def get_determinant_derivative(
+        self, w: np.ndarray, chunk_size: int = None
+    ) -> Tuple[np.ndarray]:
+        """Returns the determinants and their derivatives with respect to omega for an array of omega,
+        det'(w) = det(A) tr(A^-1 dA/dw), both from the same assembly and factorisation of A
+        """
+        det, log_derivative = self._get_log_derivative(
+            w=w, chunk_size=chunk_size, with_det=True
+        )
+        return det, det * log_derivative
+
+    def _get_sparse_determinants(
+        self, w: np.ndarray, log: bool = False, objective: str = "det"
+    ) -> Union[np.ndarray, Tuple[np.ndarray]]:
+        """Sparse counterpart of get_determinants, the sparsity pattern is shared by all the omega"""
+        if objective != "det":
+            raise ValueError("The sparse backend only supports the det objective")
+        sign = np.empty(len(w), dtype=complex)
+        logdet = np.empty(len(w), dtype=float)
+        assembler = self._get_assembler()
+        for i, w_i in enumerate(w):
+            coeff_matrix = assembler.assemble_sparse(w=w_i)
+            with self.timer.time("determinant"):
+                sign[i], logdet[i] = get_sparse_log_determinant(coeff_matrix)
+        logger.debug("Sparse determinants evaluated for %s omega", len(w))
+
+        if log:
+            return sign, logdet
+        return sign * np.exp(logdet)
+
+    def _get_determinants_of_freq(
+        self,
+        freq: np.ndarray,
+        chunk_size: int = None,
+        workers: int = None,
+        objective: str = "det",
+    ) -> np.ndarray:
+        """Returns the determinants over the frequencies, split across a pool of worker processes if workers is given"""
+        if workers is None or workers <= 1:
+            return self.get_determinants(
+                w=get_omega(freq), chunk_size=chunk_size, objective=objective
+            )
+        return get_determinants_parallel(
+            description=self.get_description(),
+            freq=freq,
+            # Large default chunks are cut down so that every worker gets a share of the frequencies
+            chunk_size=min(
+                self._get_chunk_size(chunk_size, objective=objective),
+                max(1, int(np.ceil(len(freq) / workers))),
+            ),
+            workers=workers,
+            objective=objective,
+        )
+
+    def _iter_determinants(
+        self,
+        freq: np.ndarray,
+        chunk_size: int = None,
+        workers: int = None,
+        objective: str = "det",
+    ):
+        """Yields (freq, determinant) over the frequencies, the determinants are evaluated lazily in chunks
+        With workers the whole scan is evaluated in parallel first
+        """
+        if workers is not None and workers > 1:
+            output = self._get_determinants_of_freq(
+                freq=freq, chunk_size=chunk_size, workers=workers, objective=objective
+            )
+            yield from zip(freq, output)
+            return
+        chunk_size = self._get_chunk_size(chunk_size, objective=objective)
+        for start in range(0, len(freq), chunk_size):
+            freq_chunk = freq[start : start + chunk_size]
+            output_chunk = self.get_determinants(
+                w=get_omega(freq_chunk), chunk_size=chunk_size, objective=objective
+            )
+            yield from zip(freq_chunk, output_chunk)
+
     def get_frequency_graph(
-        self, lower_limit: float, upper_limit: float, step_size: float
+        self,
+        lower_limit: float,
+        upper_limit: float,
+        step_size: float,
+        chunk_size: int = None,
+        workers: int = None,
+        plot: bool = True,
     ) -> np.array:
-        "Creates a graph of the real and imaginary components of the determinant"
+        """Creates a graph of the real and imaginary components of the determinant
+        workers is the number of processes the scan is split across, by default it runs serially.
+        With plot unset nothing is drawn, use sweep to stream long scans to disk instead of keeping them in memory
+        """
         freq = np.arange(lower_limit, upper_limit, step_size)
-        output = np.zeros(len(freq), dtype=np.complex_)
-        omega = freq * np.pi * 2
-
-        for i in range(len(freq)):
-            output[i] = self.get_determinant(w=omega[i])
-            print(f"{i}/{len(freq)}", " " * 10, end="\r")
-
-        plt.plot(freq, np.real(output))
-        plt.plot(freq, np.imag(output))
-        plt.plot([lower_limit, upper_limit], [0, 0], "--")
-        plt.legend(["Real", "Imaginary"])
-        plt.show()
-        plt.figure()
-        plt.plot(freq, np.abs(output))
-        plt.legend(["Abs"])
-        plt.show()
+        output = self._get_determinants_of_freq(
+            freq=freq, chunk_size=chunk_size, workers=workers
+        )
+        if plot:
+            plot_frequency_response(freq, output)
         return output
 
+    def iter_frequency_response(
+        self,
+        lower_limit: float,
+        upper_limit: float,
+        step_size: float,
+        chunk_size: int = None,
+        objective: str = "det",
+        start: int = 0,
+    ):
+        """Yields (freq, determinant) chunks over the frequencies of get_frequency_graph as they are evaluated,
+        beginning with the frequency at index start
+        """
+        freq = np.arange(lower_limit, upper_limit, step_size)
+        chunk_size = self._get_chunk_size(chunk_size, objective=objective)
+        for begin in range(start, len(freq), chunk_size):
+            freq_chunk = freq[begin : begin + chunk_size]
+            yield freq_chunk, self.get_determinants(
+                w=get_omega(freq_chunk), chunk_size=chunk_size, objective=objective
+            )
+
+    def sweep(
+        self,
+        lower_limit: float,
+        upper_limit: float,
+        step_size: float,
+        sinks: List[sink],
+        chunk_size: int = None,
+        objective: str = "det",
+        resume: bool = False,
+    ) -> int:
+        """Streams the frequency response into the sinks chunk by chunk, see modules.sinks, and returns the number of frequencies.
+        If resume is set, the sweep carries on after the last frequency held by all the resumable sinks
+        """
+        total = len(np.arange(lower_limit, upper_limit, step_size))
+        start = 0
+        for consumer in sinks:
+            consumer.open(total=total, resume=resume)
+        if resume:
+            counts = [consumer.get_written_count() for consumer in sinks]
+            counts = [count for count in counts if count is not None]
+            start = min(counts, default=0)
+            for consumer in sinks:
+                consumer.truncate(start)
+            logger.info("Resuming the sweep at frequency %s of %s", start, total)
+
+        try:
+            for freq_chunk, output_chunk in self.iter_frequency_response(
+                lower_limit=lower_limit,
+                upper_limit=upper_limit,
+                step_size=step_size,
+                chunk_size=chunk_size,
+                objective=objective,
+                start=start,
+            ):
+                for consumer in sinks:
+                    consumer.write(freq_chunk, output_chunk)
+        finally:
+            for consumer in sinks:
+                consumer.close()
+        return total
+
+    def get_forced_response(
+        self,
+        freq: np.ndarray,
+        loads: List[Tuple[int, float, float, float]],
+        observations: List[Tuple[int, float]],
+        chunk_size: int = None,
+    ) -> Dict[str, np.ndarray]:
+        """Returns the displacements at the observation points driven by point forces over an array of frequencies (Hz).
+        Each load is (member id, position, transverse force, axial force) and each observation point (member id, position),
+        positions being measured from the end of the member at its lower constraint id.
+        A(w) x = f is solved chunk_size frequencies at a time, every matrix being factorised once for all the loads.
+        The transverse and axial displacements are shaped (n_freq, n_loads, n_observations), so a unit force gives the receptance
+        """
+        freq = np.atleast_1d(np.asarray(freq, dtype=float))
+        chunks = list(
+            self.iter_forced_response(
+                freq=freq, loads=loads, observations=observations, chunk_size=chunk_size
+            )
+        )
+        return {
+            "frequency": freq,
+            "transverse": np.concatenate([chunk["transverse"] for chunk in chunks]),
+            "axial": np.concatenate([chunk["axial"] for chunk in chunks]),
+        }
+
+    def iter_forced_response(
+        self,
+        freq: np.ndarray,
+        loads: List[Tuple[int, float, float, float]],
+        observations: List[Tuple[int, float]],
+        chunk_size: int = None,
+    ):
+        """Yields the forced response of get_forced_response chunk by chunk as it is evaluated, to stream long sweeps"""
+        freq = np.atleast_1d(np.asarray(freq, dtype=float))
+        assembler = self._get_assembler()
+        chunk_size = self._get_chunk_size(chunk_size)
+        for start in range(0, len(freq), chunk_size):
+            freq_chunk = freq[start : start + chunk_size]
+            w = get_omega(freq_chunk)
+            load_vectors = get_load_vectors(
+                assembler=assembler, members=self.members, loads=loads, w=w
+            )
+            with self.timer.time("forced_solve"):
+                if self.sparse:
+                    solutions = np.stack(
+                        [
+                            solve_forced_sparse(
+                                self.get_sparse_matrix(w=w_i), load_vectors[i]
+                            )
+                            for i, w_i in enumerate(w)
+                        ]
+                    )
+                else:
+                    solutions = solve_forced(
+                        self.get_equation_matrix(w=w), load_vectors
+                    )
+            transverse, axial = get_displacements(
+                assembler=assembler,
+                members=self.members,
+                loads=loads,
+                observations=observations,
+                w=w,
+                solutions=solutions,
+            )
+            logger.debug(
+                "Forced response evaluated for %s/%s",
+                min(start + chunk_size, len(freq)),
+                len(freq),
+            )
+            yield {"frequency": freq_chunk, "transverse": transverse, "axial": axial}
+
     def get_natural_frequency_newton(
         self,
-        initial_guess: float,
+        initial_guess: Union[float, np.ndarray],
         tol: float = 1e-09,
         max_iter: int = 100,
         print_det: bool = True,
-    ) -> float:
-        """Takes in the a initial guess and uses newton raphson method to solve for natural frequency"""
-        get_determinant = lambda x: self.get_determinant(
-            w=np.abs(x) * 2 * np.pi, print_det=print_det
+        fprime: bool = True,
+    ) -> Union[float, np.ndarray]:
+        """Takes in the a initial guess and uses newton raphson method to solve for natural frequency.
+        The derivative of the determinant is analytic, see get_log_derivative, so each step needs a single solve.
+        An array of initial guesses is refined all at once and gives an array of natural frequencies.
+        With fprime unset, or on the sparse backend, the secant method is used instead
+        """
+        if not fprime or self.sparse:
+            from scipy.optimize import newton
+
+            get_determinant = lambda x: self.get_determinant(
+                w=np.abs(x) * 2 * np.pi, print_det=print_det
+            )
+            return np.abs(
+                newton(get_determinant, initial_guess, tol=tol, maxiter=max_iter)
+            )
+
+        records = self.refine_natural_frequencies(
+            initial_guesses=np.atleast_1d(initial_guess),
+            tol=tol,
+            max_iter=max_iter,
+            print_det=print_det,
         )
-        return np.abs(newton(get_determinant, initial_guess, tol=tol, maxiter=max_iter))
+        if not records["converged"].all():
+            raise RuntimeError(
+                f"{np.count_nonzero(~records['converged'])} of the guesses did not converge in {max_iter} iterations"
+            )
+        if np.ndim(initial_guess) == 0:
+            return records["frequency"][0]
+        return records["frequency"]
+
+    def refine_natural_frequencies(
+        self,
+        initial_guesses: np.ndarray,
+        tol: float = 1e-09,
+        max_iter: int = 100,
+        duplicate_rtol: float = 1e-06,
+        chunk_size: int = None,
+        print_det: bool = False,
+    ) -> np.ndarray:
+        """Refines many approximate natural frequencies (Hz), e.g. from a coarse scan, with the Newton method.
+        At every iteration the guesses which have not converged yet are evaluated in one stacked call and the converged
+        ones are dropped. Gives a structured array of modules.roots.NEWTON_RECORD, one record per guess,
+        where guesses converging to the same root point to the first of them through duplicate_of
+        """
+
+        def log_derivative(freq: np.ndarray) -> np.ndarray:
+            dets, derivative = self._get_log_derivative(
+                w=get_omega(freq), chunk_size=chunk_size, with_det=print_det
+            )
+            if print_det:
+                for det in dets:
+                    print(f"Determinant: {det}")
+            # d/dfreq = 2 pi d/dw
+            return 2 * np.pi * derivative
+
+        return newton_refine(
+            log_derivative=log_derivative,
+            guesses=np.asarray(initial_guesses, dtype=float),
+            tol=tol,
+            max_iter=max_iter,
+            duplicate_rtol=duplicate_rtol,
+        )
+
+    def get_max_step(self, freq: float, max_phase_step: float = np.pi / 2) -> float:
+        """Bounds the frequency step using the wave numbers of the members.
+        Modes are roughly a phase of pi apart, so a step accumulating at most max_phase_step cannot skip a mode
+        """
+        phase_rate = 0
+        for member in self.members.values():
+            phase_rate = phase_rate + member.get_phase_rate(w=get_omega(freq))
+        # The phase rate is per omega, the step is in Hz
+        return max_phase_step / (phase_rate * 2 * np.pi)
+
+    def _iter_adaptive(
+        self,
+        finder: root_finder,
+        lower_limit: float,
+        upper_limit: float,
+        step_size: float,
+        min_step: float,
+        phase_tol: float = np.pi / 4,
+        curvature_tol: float = 0.5,
+    ):
+        """Yields (freq, determinant) with a step adapted to the determinant.
+        The step shrinks while the phase rotates faster than phase_tol or the determinant departs from its linear
+        extrapolation by more than curvature_tol, and grows in quiet bands up to the wave number bound of get_max_step.
+        Phase flips are accepted as they are since they bracket a root
+        """
+        freq_1 = lower_limit
+        output_1 = finder.evaluate(freq_1)
+        yield freq_1, output_1
+        freq_0, output_0 = None, None
+        step = step_size
+
+        while freq_1 < upper_limit:
+            max_step = self.get_max_step(max(freq_1, min_step))
+            step = min(max(step, min_step), max_step)
+            freq_2 = min(freq_1 + step, upper_limit)
+            output_2 = finder.evaluate(freq_2)
+
+            # The determinant is nan at omega = 0, which gives no phase change
+            with np.errstate(invalid="ignore"):
+                phase_change = np.abs(np.angle(output_2 / output_1))
+            if freq_0 is None:
+                curvature = 0
+            else:
+                predicted = output_1 + (output_1 - output_0) * (
+                    (freq_2 - freq_1) / (freq_1 - freq_0)
+                )
+                scale = max(np.abs(output_1), np.abs(output_2))
+                curvature = np.abs(output_2 - predicted) / scale
+
+            rapid = phase_change > phase_tol or curvature > curvature_tol
+            if rapid and not is_phase_flip(output_1, output_2) and step > min_step:
+                step = step / 2
+                continue
+            if phase_change < phase_tol / 4 and curvature < curvature_tol / 4:
+                step = step * 2
+
+            yield freq_2, output_2
+            freq_0, output_0 = freq_1, output_1
+            freq_1, output_1 = freq_2, output_2
 
     def get_natural_frequency(
         self,
@@ -223,186 +975,250 @@ class frame:
         step_size: float = 1,
         atol=1e-08,
         rtol=1e-05,
-    ) -> List[float]:
-        """Returns the first n natural frequencies by using the bisect method at each step between the lower and upper limit"""
+        chunk_size: int = None,
+        workers: int = None,
+        method: str = "brent",
+        xtol: float = 1e-10,
+        max_iter: int = 100,
+        full_output: bool = False,
+        adaptive: bool = False,
+        min_step: float = None,
+        objective: str = "det",
+        condense: bool = True,
+    ) -> Union[List[float], Tuple[List[float], List[Dict]]]:
+        """Returns the first n natural frequencies found by scanning between the lower and upper limit.
+        Roots are bracketed on phase flips of the determinant or on minima of |det| and refined with the brent or illinois method.
+        The determinants on the grid are evaluated chunk_size at a time, split across workers processes if given.
+        A root is accepted when |det| is below rtol times |det| at the bracket endpoints and it is confirmed,
+        whatever the objective, by the conditioning indicator of get_singular_indicator being below atol.
+        atol therefore applies to the ratio of the smallest to the largest singular value, which lies between 0 and 1.
+        The chain objective and the sparse backend estimate the ratio from a sparse LU instead of a dense SVD.
+        If full_output is set, the iteration and function evaluation counts of every root are returned as well.
+        If adaptive is set, the scan starts with step_size and adapts it between min_step and the bound from the member wave numbers.
+        objective is the function searched for roots, see get_determinant. "svd" searches the conditioning indicator itself,
+        which stays between 0 and 1 on frames where the determinant underflows.
+        If condense is set and the frame is a serial chain, the "det" objective is swapped for the condensed "chain" one
+        which only handles 3x3 blocks, frames with loops keep the global matrix
+        """
+        if objective not in OBJECTIVES + ["chain"]:
+            raise ValueError(f"objective must be one of {OBJECTIVES + ['chain']}")
+        if condense and objective == "det" and self._get_chain() is not None:
+            logger.debug(
+                "Serial chain detected, the condensed characteristic function is used"
+            )
+            objective = "chain"
         natural_frequencies = []
+        root_info = []
 
-        freq_1 = lower_limit
-        freq_2 = lower_limit + step_size
-        omega = lambda freq: freq * np.pi * 2
-
-        def sign_check(output_1: complex, output_2: complex) -> bool:
-            real_sign = np.sign(np.real(output_1) / np.real(output_2))
-            imag_sign = np.sign(np.imag(output_1) / np.imag(output_2))
-            if real_sign <= 0 and imag_sign < 0:
-                return True
-            else:
-                return False
+        finder = root_finder(
+            func=lambda freq: self.get_determinant(
+                w=get_omega(freq), objective=objective
+            ),
+            method=method,
+            xtol=xtol,
+            max_iter=max_iter,
+            atol=atol,
+            rtol=rtol,
+            indicator=lambda freq: self.get_singular_indicator(
+                w=get_omega(freq), estimate=self.sparse or objective == "chain"
+            ),
+        )
 
-        output_1 = self.get_determinant(w=omega(freq=freq_1))
-        output_2 = self.get_determinant(w=omega(freq=freq_2))
+        if adaptive:
+            grid = self._iter_adaptive(
+                finder=finder,
+                lower_limit=lower_limit,
+                upper_limit=upper_limit,
+                step_size=step_size,
+                min_step=step_size / 100 if min_step is None else min_step,
+            )
+        else:
+            step_count = int(np.ceil((upper_limit - lower_limit) / step_size))
+            freq_grid = lower_limit + step_size * np.arange(step_count + 1)
+            grid = self._iter_determinants(
+                freq=freq_grid,
+                chunk_size=chunk_size,
+                workers=workers,
+                objective=objective,
+            )
+        freq_0, output_0 = None, None
+        freq_1, output_1 = next(grid)
+        finder.add(freq_1, output_1)
+        flip_1 = False
 
-        # Implemented the bisect method
-        while n > 0 and freq_1 < upper_limit:
+        for freq_2, output_2 in grid:
+            if n <= 0:
+                break
             print(f"Checking region [{freq_1}, {freq_2}]", " " * 10, end="\r")
-            if sign_check(output_1, output_2):
+            finder.add(freq_2, output_2)
+            flip_2 = is_phase_flip(output_1, output_2)
+
+            result = None
+            if flip_2:
                 print(f"\nPossible root in region [{freq_1}, {freq_2}]")
-                max_iter = 100
-                root_found = False
-                counter = 0
-                x1 = freq_1
-                x2 = freq_2
-                while counter < max_iter:
-                    counter = counter + 1
-                    x = (x1 + x2) / 2
-                    output = self.get_determinant(w=omega(freq=x))
-                    if np.isclose(output, 0, atol=atol, rtol=rtol):
-                        natural_frequencies.append(x)
-                        n = n - 1
-                        root_found = True
-                        break
-
-                    if sign_check(output_1, output):
-                        x2 = x
-                    elif sign_check(output_2, output):
-                        x1 = x
-                    else:
-                        break
+                result = finder.refine(freq_1, freq_2)
+            elif (
+                freq_0 is not None
+                and not flip_1
+                and is_minimum(output_0, output_1, output_2)
+            ):
+                print(f"\nPossible root in region [{freq_0}, {freq_2}]")
+                result = finder.minimise(freq_0, freq_2)
+
+            if result is not None:
+                root_info.append(result)
+                if result["converged"]:
+                    natural_frequencies.append(result["frequency"])
+                    n = n - 1
                     print(
-                        f"Iteration: {counter}, Det: {abs(output)}, freq: {x}", end="\r"
+                        f"Natural frequency found at {result['frequency']} "
+                        f"({result['iterations']} iterations, {result['function_calls']} evaluations)"
                     )
-                print(" " * 100, end="\r")
-                if not root_found:
-                    print(f"Natural frequency not found in range, continuing")
                 else:
-                    print(f"Natural frequency found at {x}")
-            freq_1 = freq_2
-            freq_2 = freq_2 + step_size
-            output_1 = output_2
-            output_2 = self.get_determinant(w=omega(freq=freq_2))
+                    print(f"Natural frequency not found in range, continuing")
 
+            freq_0, output_0 = freq_1, output_1
+            freq_1, output_1 = freq_2, output_2
+            flip_1 = flip_2
+
+        logger.debug("%s determinants evaluated one at a time", finder.function_calls)
+        if full_output:
+            return natural_frequencies, root_info
         return natural_frequencies
 
-    def get_params_solution(self, natural_freq, atol=1e-05, rtol=1e-05) -> Dict:
-        """Using the natural frequncy and computes the parameters by finding eigenvector for the eigenvalue 0"""
+    def parametric_study(
+        self,
+        parameters: Dict[str, np.ndarray],
+        n: int = 1,
+        grid: bool = True,
+        workers: int = None,
+        batch_size: int = 1,
+        **search_kwargs,
+    ) -> np.ndarray:
+        """Searches the first n natural frequencies over a set of property values, the topology being kept.
+        parameters maps labels such as member_0_length, member_2_youngs_modulus or joint_3_theta (degrees) to arrays of values,
+        all their combinations are studied if grid is set, otherwise the arrays are zipped.
+        The properties are changed in place, so the assembly layout and the compiled kernels are reused for every point.
+        With workers the points are sent batch_size at a time to a pool of processes.
+        search_kwargs are passed to get_natural_frequency. Gives a structured array with a field per label
+        and the natural_frequencies field, padded with nan where fewer than n are found
+        """
+        points = get_points(parameters=parameters, grid=grid)
+        if workers is None or workers <= 1:
+            return run_study(
+                frame=self, points=points, n=n, search_kwargs=search_kwargs
+            )
+        return run_study_parallel(
+            description=self.get_description(),
+            points=points,
+            n=n,
+            workers=workers,
+            search_kwargs=search_kwargs,
+            batch_size=batch_size,
+        )
+
+    def track_natural_frequencies(
+        self,
+        label: str,
+        values: np.ndarray,
+        natural_freqs: List[float] = None,
+        n: int = 1,
+        tol: float = 1e-09,
+        max_iter: int = 20,
+        min_mac: float = 0.5,
+        relative_step: float = 1e-06,
+        **search_kwargs,
+    ) -> np.ndarray:
+        """Follows the natural frequencies as one parameter, labelled as in parametric_study, goes through values.
+        The roots at the first value are natural_freqs, or the first n found by get_natural_frequency with search_kwargs.
+        At every step the new roots are predicted from the rate of change of the frequencies with the parameter,
+        -(u^H dA/dp v)/(u^H dA/dw v) with u, v the singular vectors of the mode, and refined with a few Newton steps.
+        The refined roots are matched to the previous modes by their shapes (MAC), so crossing and veering modes keep their identity.
+        When a mode is not matched with a MAC of at least min_mac the frequencies are scanned again with search_kwargs.
+        Gives a structured array with the parameter, natural_frequencies, mac and Newton iterations of every mode,
+        and whether a rescan was needed, for each value
+        """
+        return run_continuation(
+            frame=self,
+            label=label,
+            values=values,
+            natural_freqs=natural_freqs,
+            tol=tol,
+            max_iter=max_iter,
+            min_mac=min_mac,
+            relative_step=relative_step,
+            search_kwargs=dict(search_kwargs, n=n),
+        )
 
-        val, vec = np.linalg.eig(self.get_equation_matrix(w=2 * np.pi * natural_freq))
-        solns = vec[:, np.abs(val).argmin()]
+    def get_null_space(self, natural_freq, atol=1e-05, rtol=1e-05) -> Dict:
+        """Computes the null space of the A matrix at the natural frequency with an SVD, see modules.null_space.
+        The matrix is assembled on first use and kept apart from the frequency cache, so later calls at the same
+        natural frequency, e.g. for the mode shapes, reuse it.
+        Singular values below atol + rtol times the largest one count as zero, several of them for repeated or close modes.
+        The first null vector is kept as the solution used by the mode shapes
+        """
+        w = get_omega(natural_freq)
+        key = ("matrix", float(w), self._get_state())
+        coeff_matrix = self.root_cache.get(key)
+        if coeff_matrix is None:
+            coeff_matrix = self.get_equation_matrix(w=w)
+            self.root_cache.put(key, coeff_matrix)
+        null_space = get_null_space(coeff_matrix, atol=atol, rtol=rtol)
 
         assert (
-            np.isclose(val[np.abs(val).argmin()], 0, atol=atol, rtol=rtol) == True
+            null_space["dimension"] > 0
         ), "The value provided is not a natural frequency"
+        if null_space["dimension"] > 1:
+            logger.info(
+                "Null space of dimension %s at %s Hz, the modes are repeated or close",
+                null_space["dimension"],
+                natural_freq,
+            )
+
+        self.params_solution = null_space["vectors"][:, 0]
+        return null_space
+
+    def get_params_solution(self, natural_freq, atol=1e-05, rtol=1e-05) -> Dict:
+        """Using the natural frequncy and computes the parameters by finding the null vector of the A matrix, see get_null_space"""
+
+        null_space = self.get_null_space(
+            natural_freq=natural_freq, atol=atol, rtol=rtol
+        )
+        solns = null_space["vectors"][:, 0]
 
+        self._set_params()
         self.params_subs = dict(zip(self.params, solns))
         return self.params_subs
 
-    def get_mode_shape(
-        self,
-        n: int = None,
-        natural_freq: float = None,
-        origin_constraint_id: int = None,
-        step_size: float = 0.01,
-        scaling_factor: float = 0.5,
-    ) -> np.array:
-        """
-        Finds the mode shape of the frame and plots it.
-        Origin constraint id is the id of the constraint (joint/bc) which the user would like at origin. In general, it can be left blank.
-        If origin constraint id is not provided, it fixed a fixed_end as the origin.
-        """
-        if (n is None) and (natural_freq is None):
-            logger.error(
-                "Either n or natural frequency must be provided in order to find the mode shape"
-            )
-            return None
-        if natural_freq is None:
-            print("Beginning search for Natural Frequency")
-            natural_freqs = self.get_natural_frequency(n=n)
-            natural_freq = natural_freqs[-1]
-            print(f"Natural Frequency for {n} mode shape is {natural_freq}")
-        omega = natural_freq * np.pi * 2
+    def _get_member_solution(self, member: member_type) -> np.ndarray:
+        """Gives the wave amplitudes of a member from the last call to get_null_space"""
+        offset = self._get_assembler().column_offsets[member.id]
+        return self.params_solution[offset : offset + member.get_parameter_count()]
 
-        for constraint in self.constraints.values():
-            if type(constraint) == fixed_end_type:
-                origin_constraint_id = constraint.id
-                break
-        if origin_constraint_id == None:
-            logger.error(
-                "No Fixed End found in figure, please specify origin_constraint_id"
-            )
-            return None
-
-        _ = self.get_params_solution(natural_freq=natural_freq)
+    def _get_traversal(self, origin_constraint_id: int) -> List[Tuple]:
+        """Walks the members from the origin constraint and gives (member, start constraint id, angle, offset) of each,
+        which places the member in the global coordinate system. It only depends on the topology so it is shared by all modes
+        """
         constraint_curr = self.constraints[origin_constraint_id]
         member_curr = constraint_curr.members[0]
 
-        # Initialising values
         offset = np.array([0, 0])
         angle = 0
-        Handle = True
-        mode_shape_positive = [np.matrix([[0], [0]]).reshape(1, 2)]
-        mode_shape_negative = [np.matrix([[0], [0]]).reshape(1, 2)]
-        original_shape = [np.matrix([[0], [0]]).reshape(1, 2)]
+        traversal = []
+        # Set of completed members and constraints to prevent loop
         members_completed = set()
         constraints_completed = set()
 
-        while Handle:
-            # Set of completed members and constraints to prevent loop
+        while True:
             members_completed.add(member_curr.id)
             constraints_completed.add(constraint_curr.id)
+            traversal.append((member_curr, constraint_curr.id, angle, offset))
 
-            # Points along memmber in its local coordinate system
-            x = np.append(
-                np.arange(step_size, member_curr.length, step_size), member_curr.length
-            )
-            v, u = member_curr.get_deformation(
-                w=omega, lengths=x, id=constraint_curr.id, subs_dict=self.params_subs
-            )
-            v = v * scaling_factor
-            u = u * scaling_factor
-
-            x_deformed_positive = np.real(u).reshape(len(x)) + x
-            y_deformed_positive = np.real(v).T
-
-            x_deformed_negative = -np.real(u).reshape(len(x)) + x
-            y_deformed_negative = -np.real(v).T
-
-            points_deformed_positive = np.stack(
-                [x_deformed_positive, y_deformed_positive]
-            ).T.reshape(len(x), 2)
-            points_deformed_negative = np.stack(
-                [x_deformed_negative, y_deformed_negative]
-            ).T.reshape(len(x), 2)
-            points_original = np.stack([x, np.zeros(len(x))]).T.reshape(len(x), 2)
-
-            # Converting local coordinates to global coordinates
             rotation_matrix = np.array(
                 [[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]]
             )
-            deformation_rotated_positive = np.matmul(
-                rotation_matrix, points_deformed_positive.T
-            ).T
-            deformation_rotated_translated_positive = (
-                deformation_rotated_positive + offset
-            )
-
-            deformation_rotated_negative = np.matmul(
-                rotation_matrix, points_deformed_negative.T
-            ).T
-            deformation_rotated_translated_negative = (
-                deformation_rotated_negative + offset
-            )
-
-            original_rotated = np.matmul(rotation_matrix, points_original.T).T
-            original_rotated_translated = original_rotated + offset
-
-            mode_shape_positive.append(deformation_rotated_translated_positive)
-            mode_shape_negative.append(deformation_rotated_translated_negative)
-            original_shape.append(original_rotated_translated)
-
-            offset = offset + np.array(
-                np.matmul(rotation_matrix, np.array([member_curr.length, 0])).T
-            ).reshape(
-                2,
+            offset = offset + np.matmul(
+                rotation_matrix, np.array([member_curr.length, 0])
             )
 
             constraint_ids = member_curr.constraint_ids
@@ -420,24 +1236,163 @@ class frame:
 
             if members[0].id not in members_completed:
                 member_curr = members[0]
-            elif len(members) > 1 and members[1] not in members_completed:
+            elif len(members) > 1 and members[1].id not in members_completed:
                 member_curr = members[1]
             else:
-                Handle = False
+                return traversal
+
+    def _get_origin_constraint_id(self, origin_constraint_id: int = None) -> int:
+        """Defaults the origin to the first fixed_end of the frame"""
+        if origin_constraint_id is not None:
+            return origin_constraint_id
+        for constraint in self.constraints.values():
+            if type(constraint) == fixed_end_type:
+                return constraint.id
+        return None
+
+    def get_mode_shapes(
+        self,
+        n: int = None,
+        natural_freqs: List[float] = None,
+        origin_constraint_id: int = None,
+        step_size: float = 0.01,
+        scaling_factor: float = 0.5,
+        plot: bool = False,
+        **search_kwargs,
+    ) -> Dict:
+        """
+        Finds the mode shapes of the frame for a list of natural frequencies, or for the first n found in a single search
+        which is passed search_kwargs (see get_natural_frequency).
+        The topology is traversed once for all the modes and each mode is plotted in its own figure if plot is set.
+        Returns a dict with the natural frequencies, the positive and negative deformed shapes of every mode and the original shape
+        """
+        if (n is None) and (natural_freqs is None):
+            logger.error(
+                "Either n or natural frequencies must be provided in order to find the mode shapes"
+            )
+            return None
+        origin_constraint_id = self._get_origin_constraint_id(origin_constraint_id)
+        if origin_constraint_id is None:
+            logger.error(
+                "No Fixed End found in figure, please specify origin_constraint_id"
+            )
+            return None
+        if natural_freqs is None:
+            print("Beginning search for Natural Frequencies")
+            natural_freqs = self.get_natural_frequency(n=n, **search_kwargs)
 
-        mode_shape_positive = np.concatenate(mode_shape_positive)
-        mode_shape_negative = np.concatenate(mode_shape_negative)
+        traversal = self._get_traversal(origin_constraint_id)
+        # Points along each member in its local coordinate system
+        points = []
+        original_shape = [np.zeros((1, 2))]
+        for member_curr, _, angle, offset in traversal:
+            x = np.append(
+                np.arange(step_size, member_curr.length, step_size), member_curr.length
+            )
+            rotation_matrix = np.array(
+                [[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]]
+            )
+            points.append((x, rotation_matrix))
+            points_original = np.stack([x, np.zeros(len(x))], axis=-1)
+            original_shape.append(
+                np.matmul(points_original, rotation_matrix.T) + offset
+            )
         original_shape = np.concatenate(original_shape)
 
-        plt.plot(mode_shape_positive[:, 0], mode_shape_positive[:, 1], "b")
-        plt.plot(original_shape[:, 0], original_shape[:, 1], "r--")
-        plt.plot(mode_shape_negative[:, 0], mode_shape_negative[:, 1], "b")
-        plt.legend(["Mode Shape", "Original Shape"])
-        plt.xticks([])
-        plt.yticks([])
+        mode_shapes_positive = []
+        mode_shapes_negative = []
+        for natural_freq in natural_freqs:
+            omega = get_omega(natural_freq)
+            _ = self.get_null_space(natural_freq=natural_freq)
+            mode_shape_positive = [np.zeros((1, 2))]
+            mode_shape_negative = [np.zeros((1, 2))]
+
+            for (member_curr, constraint_id, _, offset), (x, rotation_matrix) in zip(
+                traversal, points
+            ):
+                v, u = member_curr.get_deformation(
+                    w=omega,
+                    lengths=x,
+                    id=constraint_id,
+                    parameters=self._get_member_solution(member_curr),
+                )
+                v = np.real(v) * scaling_factor
+                u = np.real(u) * scaling_factor
+
+                # Converting local coordinates to global coordinates
+                points_deformed_positive = np.stack([x + u, v], axis=-1)
+                points_deformed_negative = np.stack([x - u, -v], axis=-1)
+                mode_shape_positive.append(
+                    np.matmul(points_deformed_positive, rotation_matrix.T) + offset
+                )
+                mode_shape_negative.append(
+                    np.matmul(points_deformed_negative, rotation_matrix.T) + offset
+                )
+
+            mode_shapes_positive.append(np.concatenate(mode_shape_positive))
+            mode_shapes_negative.append(np.concatenate(mode_shape_negative))
+
+        if plot:
+            from matplotlib import pyplot as plt
+
+            for mode_shape_positive, mode_shape_negative in zip(
+                mode_shapes_positive, mode_shapes_negative
+            ):
+                plt.figure()
+                plot_mode_shape(
+                    mode_shape_positive, mode_shape_negative, original_shape
+                )
+
+        return {
+            "natural_frequencies": list(natural_freqs),
+            "positive": mode_shapes_positive,
+            "negative": mode_shapes_negative,
+            "original": original_shape,
+        }
+
+    def get_mode_shape(
+        self,
+        n: int = None,
+        natural_freq: float = None,
+        origin_constraint_id: int = None,
+        step_size: float = 0.01,
+        scaling_factor: float = 0.5,
+        plot: bool = True,
+    ) -> np.array:
+        """
+        Finds the mode shape of the frame and plots it.
+        Origin constraint id is the id of the constraint (joint/bc) which the user would like at origin. In general, it can be left blank.
+        If origin constraint id is not provided, it fixed a fixed_end as the origin.
+        Use get_mode_shapes for several modes at once
+        """
+        if (n is None) and (natural_freq is None):
+            logger.error(
+                "Either n or natural frequency must be provided in order to find the mode shape"
+            )
+            return None
+        if natural_freq is None:
+            print("Beginning search for Natural Frequency")
+            natural_freqs = self.get_natural_frequency(n=n)
+            natural_freq = natural_freqs[-1]
+            print(f"Natural Frequency for {n} mode shape is {natural_freq}")
+
+        mode_shapes = self.get_mode_shapes(
+            natural_freqs=[natural_freq],
+            origin_constraint_id=origin_constraint_id,
+            step_size=step_size,
+            scaling_factor=scaling_factor,
+        )
+        if mode_shapes is None:
+            return None
+        if plot:
+            plot_mode_shape(
+                mode_shapes["positive"][0],
+                mode_shapes["negative"][0],
+                mode_shapes["original"],
+            )
 
         return (
-            np.array(mode_shape_positive),
-            np.array(mode_shape_negative),
-            np.array(original_shape),
+            mode_shapes["positive"][0],
+            mode_shapes["negative"][0],
+            mode_shapes["original"],
         )
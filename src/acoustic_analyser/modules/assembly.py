@@ -0,0 +1,252 @@
+from acoustic_analyser.modules.member import member as member_type
+from acoustic_analyser.modules.cache import lru_cache
+from acoustic_analyser.modules.instrumentation import stage_timer
+from acoustic_analyser.modules.sparse import sparse_pattern
+from typing import Dict, Hashable, List, Union
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+# Row and column positions of the entries of a 3x3 block
+BLOCK_ROWS = np.repeat(np.arange(3), 3)
+BLOCK_COLS = np.tile(np.arange(3), 3)
+
+
+def get_source_blocks(
+    source,
+    w: np.ndarray,
+    cache: lru_cache,
+    state: tuple,
+    timer: stage_timer,
+    evaluated: Dict = None,
+) -> List[np.ndarray]:
+    """Gets the blocks of a member or constraint for an array of omega.
+    Sources with the same kernel key give the same blocks, so evaluated holds the blocks already computed for these omega
+    and every equivalence class is only evaluated once.
+    For a single omega the blocks of sources flagged as cacheable (the joint R/T matrices) go through the cache
+    """
+    kernel_key = source.get_kernel_key()
+    if evaluated is not None and kernel_key is not None and kernel_key in evaluated:
+        return evaluated[kernel_key]
+
+    use_cache = cache is not None and len(w) == 1 and source.cacheable_blocks
+    blocks = None
+    if use_cache:
+        if kernel_key is None:
+            key = ("rt", source.id, float(w[0]), state)
+        else:
+            key = ("rt", kernel_key, float(w[0]))
+        blocks = cache.get(key)
+    if blocks is None:
+        if source.cacheable_blocks:
+            with timer.time("rt_solve"):
+                blocks = source.get_blocks(w=w)
+        else:
+            blocks = source.get_blocks(w=w)
+        if use_cache:
+            cache.put(key, blocks)
+    if evaluated is not None and kernel_key is not None:
+        evaluated[kernel_key] = blocks
+    return blocks
+
+
+class assembler:
+    """This class builds the numeric coefficient matrix of a frame.
+    The position of every equation block is worked out once when the topology is frozen,
+    after which the blocks are written into a preallocated matrix for every omega
+    """
+
+    def __init__(
+        self,
+        members: Dict[int, member_type],
+        constraints: Dict,
+        timer: stage_timer = None,
+    ) -> None:
+        self.timer = stage_timer() if timer is None else timer
+        self.members = list(members.values())
+        self.constraints = list(constraints.values())
+
+        self.column_offsets: Dict[int, int] = {}
+        size = 0
+        for member in self.members:
+            self.column_offsets[member.id] = size
+            size = size + member.get_parameter_count()
+        self.size = size
+
+        # The members sharing one store have their propagation blocks evaluated all at once
+        stores = {id(member.store) for member in self.members}
+        self.store = self.members[0].store if len(stores) == 1 else None
+        self.member_rows = np.array(
+            [member.index for member in self.members], dtype=int
+        )
+
+        # The constraints come first followed by the members, same as the symbolic path
+        self.sources = self.constraints + self.members
+        block_rows, block_cols, identity_rows, identity_cols = [], [], [], []
+        # First row of the propagation equations of each member, where the loads of a forced response enter
+        self.member_row_offsets: Dict[int, int] = {}
+        row = 0
+        for source in self.sources:
+            if isinstance(source, member_type):
+                self.member_row_offsets[source.id] = row
+            blocks, identities = source.get_block_layout()
+            for local_row, member_id, offset in blocks:
+                block_rows.append(BLOCK_ROWS + row + local_row)
+                block_cols.append(BLOCK_COLS + self.column_offsets[member_id] + offset)
+            for local_row, member_id, offset in identities:
+                identity_rows.append(np.arange(3) + row + local_row)
+                identity_cols.append(
+                    np.arange(3) + self.column_offsets[member_id] + offset
+                )
+            row = row + 3 + max(spec[0] for spec in blocks + identities)
+
+        if row != self.size:
+            raise Exception(
+                f"The frame gives {row} equations for {self.size} parameters, check the joints/BCs"
+            )
+
+        self.block_rows = np.concatenate(block_rows)
+        self.block_cols = np.concatenate(block_cols)
+        self.identity_rows = np.concatenate(identity_rows)
+        self.identity_cols = np.concatenate(identity_cols)
+        self.pattern = None
+        # The dense matrix with the identity blocks is only built on the first dense assembly, never on the sparse backend
+        self.template = None
+        logger.debug("Assembly layout computed for %s parameters", self.size)
+        logger.debug(
+            "%s sources in %s equivalence classes",
+            len(self.sources),
+            len(self.get_equivalence_classes()),
+        )
+
+    def get_equivalence_classes(self) -> Dict[Hashable, List]:
+        """Groups the sources by kernel key, the sources without one are in a class of their own.
+        The keys are read again on every evaluation as joint.theta may be changed in place
+        """
+        classes: Dict[Hashable, List] = {}
+        for source in self.sources:
+            kernel_key = source.get_kernel_key()
+            if kernel_key is None:
+                kernel_key = ("source", source.id)
+            classes.setdefault(kernel_key, []).append(source)
+        return classes
+
+    def get_pattern(self) -> sparse_pattern:
+        """The sparsity pattern is computed on first use and reused for every omega"""
+        if self.pattern is None:
+            self.pattern = sparse_pattern(
+                rows=np.concatenate([self.block_rows, self.identity_rows]),
+                cols=np.concatenate([self.block_cols, self.identity_cols]),
+                size=self.size,
+            )
+        return self.pattern
+
+    def get_values(
+        self, w: np.ndarray, cache: lru_cache = None, state: tuple = None
+    ) -> np.ndarray:
+        """Gets the entries of all the blocks in the order of the layout, shaped (n_w, entries)
+        For a single omega the blocks of sources flagged as cacheable (the joint R/T matrices) go through the cache
+        """
+        values: List[np.ndarray] = []
+        evaluated = {}
+        sources = self.sources
+        if self.store is not None:
+            sources = self.constraints
+        for source in sources:
+            blocks = get_source_blocks(
+                source=source,
+                w=w,
+                cache=cache,
+                state=state,
+                timer=self.timer,
+                evaluated=evaluated,
+            )
+            values.extend(block.reshape(len(w), 9) for block in blocks)
+        if self.store is not None:
+            values.append(self.get_member_values(w=w))
+        return np.concatenate(values, axis=1)
+
+    def get_member_values(self, w: np.ndarray) -> np.ndarray:
+        """Gets the entries of the propagation blocks of all the members at once, shaped (n_w, 18 * n_members)
+        Each member has two diagonal blocks, see member.get_block_layout
+        """
+        diagonals = self.store.get_propagation_diagonals(w=w, rows=self.member_rows)
+        member_values = np.zeros(diagonals.shape[:2] + (2, 9), dtype=complex)
+        member_values[..., [0, 4, 8]] = diagonals[:, :, np.newaxis, :]
+        return member_values.reshape(len(w), -1)
+
+    def get_derivative_values(self, w: np.ndarray) -> np.ndarray:
+        """Gets the derivatives with respect to omega of the entries of get_values, shaped (n_w, entries)
+        The identity blocks are constant, so they are not part of the derivative
+        """
+        values: List[np.ndarray] = []
+        evaluated = {}
+        sources = self.sources
+        if self.store is not None:
+            sources = self.constraints
+        for source in sources:
+            kernel_key = source.get_kernel_key()
+            if kernel_key is not None and kernel_key in evaluated:
+                blocks = evaluated[kernel_key]
+            elif source.cacheable_blocks:
+                with self.timer.time("rt_derivative"):
+                    blocks = source.get_block_derivatives(w=w)
+            else:
+                blocks = source.get_block_derivatives(w=w)
+            if kernel_key is not None:
+                evaluated[kernel_key] = blocks
+            values.extend(block.reshape(len(w), 9) for block in blocks)
+        if self.store is not None:
+            diagonals = self.store.get_propagation_diagonal_derivatives(
+                w=w, rows=self.member_rows
+            )
+            member_values = np.zeros(diagonals.shape[:2] + (2, 9), dtype=complex)
+            member_values[..., [0, 4, 8]] = diagonals[:, :, np.newaxis, :]
+            values.append(member_values.reshape(len(w), -1))
+        return np.concatenate(values, axis=1)
+
+    def assemble_derivative(self, w: Union[float, np.ndarray]) -> np.ndarray:
+        """Fills the derivative of the coefficient matrix with respect to omega, shaped like assemble"""
+        w_array = np.atleast_1d(np.asarray(w, dtype=float))
+        with self.timer.time("assembly"):
+            derivative_matrix = np.zeros(
+                (len(w_array), self.size, self.size), dtype=complex
+            )
+            derivative_matrix[:, self.block_rows, self.block_cols] = (
+                self.get_derivative_values(w=w_array)
+            )
+        if np.ndim(w) == 0:
+            return derivative_matrix[0]
+        return derivative_matrix
+
+    def assemble(
+        self, w: Union[float, np.ndarray], cache: lru_cache = None, state: tuple = None
+    ) -> np.ndarray:
+        """Fills the coefficient matrix for the given omega.
+        An array of omega gives a stack of matrices shaped (n_w, N, N)
+        """
+        w_array = np.atleast_1d(np.asarray(w, dtype=float))
+        if self.template is None:
+            self.template = np.zeros((self.size, self.size), dtype=complex)
+            self.template[self.identity_rows, self.identity_cols] = -1
+        with self.timer.time("assembly"):
+            coeff_matrix = np.repeat(self.template[np.newaxis], len(w_array), axis=0)
+            coeff_matrix[:, self.block_rows, self.block_cols] = self.get_values(
+                w=w_array, cache=cache, state=state
+            )
+        if np.ndim(w) == 0:
+            return coeff_matrix[0]
+        return coeff_matrix
+
+    def assemble_sparse(self, w: float, cache: lru_cache = None, state: tuple = None):
+        """Fills the coefficient matrix for a single omega as a scipy CSC matrix using the fixed sparsity pattern"""
+        pattern = self.get_pattern()
+        with self.timer.time("assembly"):
+            values = self.get_values(
+                w=np.array([w], dtype=float), cache=cache, state=state
+            )
+            coeff_matrix = pattern.get_matrix(
+                np.concatenate([values[0], -np.ones(len(self.identity_rows))])
+            )
+        return coeff_matrix
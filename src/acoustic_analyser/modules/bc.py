@@ -1,6 +1,11 @@
 from acoustic_analyser.modules.member import member as member_type
-from acoustic_analyser.modules.rt_bc import get_r_of_fixed_end, get_r_of_free_end
-from sympy import Matrix
+from acoustic_analyser.modules.rt_bc import (
+    get_r_of_fixed_end,
+    get_r_of_free_end,
+    get_r_array_of_fixed_end,
+    get_r_array_of_free_end,
+)
+import numpy as np
 import logging
 from typing import List
 
@@ -10,6 +15,8 @@ logger = logging.getLogger("acoustic_analyser")
 class bc:
     """This class emulates a boundary condition that can be added to members"""
 
+    cacheable_blocks = False
+
     def __init__(self, member: member_type, id: int) -> None:
         if type(member) != member_type:
             raise Exception("members must belong to class Member")
@@ -21,15 +28,40 @@ class bc:
         self.id = id
         self.theta = 0
 
+    def get_block_layout(self) -> List[list]:
+        """Gives the position of the blocks of the equations as (row, member id, offset)
+        The first list holds the reflection blocks and the second one the identity blocks
+        """
+        member = self.members[0]
+        incoming, outgoing = member.get_parameter_offsets(id=self.id)
+        return [[(0, member.id, incoming)], [(0, member.id, outgoing)]]
+
+    def get_kernel_key(self) -> tuple:
+        """The reflection matrix is computed once per BC, so BCs are not grouped"""
+        return None
+
+    def get_blocks(self, w: np.ndarray) -> List[np.ndarray]:
+        """Gives the numeric reflection matrix for an array of omega in the order of get_block_layout"""
+        return [np.broadcast_to(self.reflection_array, (len(w), 3, 3))]
+
+    def get_block_derivatives(self, w: np.ndarray) -> List[np.ndarray]:
+        """The reflection matrix of a BC does not depend on omega"""
+        return [np.zeros((len(w), 3, 3), dtype=complex)]
+
 
 class free_end(bc):
     """This is a free end boundary condition"""
 
     def __init__(self, member: member_type, id: int) -> None:
         super().__init__(member=member, id=id)
-        self.reflection_matrix = get_r_of_free_end(m1=member)
+        self.reflection_array = get_r_array_of_free_end(m1=member)
+
+        logger.debug("Reflection Matrix for free_end %s calculated", self.id)
 
-        logger.debug(f"Reflection Matrix for free_end {self.id} calculated")
+    @property
+    def reflection_matrix(self):
+        """Symbolic reflection matrix, the SymPy equation file is only loaded when it is used"""
+        return get_r_of_free_end(m1=self.members[0])
 
     def get_equations(self, w: float) -> list:
         a_plus, a_minus = self.members[0].get_parameters(id=self.id, w=w)
@@ -37,16 +69,21 @@ class free_end(bc):
         matrix_reflect = self.reflection_matrix * a_plus - a_minus
 
         eqns = matrix_reflect
-        logger.debug(f"Equations for free_end {self.id} calculated")
+        logger.debug("Equations for free_end %s calculated", self.id)
         return eqns
 
 
 class fixed_end(bc):
     def __init__(self, member: member_type, id: int) -> None:
         super().__init__(member=member, id=id)
-        self.reflection_matrix = get_r_of_fixed_end(m1=member)
+        self.reflection_array = get_r_array_of_fixed_end(m1=member)
+
+        logger.debug("Reflection Matrix for fixed_end %s calculated", self.id)
 
-        logger.debug(f"Reflection Matrix for fixed_end {self.id} calculated")
+    @property
+    def reflection_matrix(self):
+        """Symbolic reflection matrix, the SymPy equation file is only loaded when it is used"""
+        return get_r_of_fixed_end(m1=self.members[0])
 
     def get_equations(self, w: float) -> list:
         """Gets the equations from the reflection and transmission matrices"""
@@ -55,5 +92,5 @@ class fixed_end(bc):
         matrix_reflect = self.reflection_matrix * a_plus - a_minus
 
         eqns = matrix_reflect
-        logger.debug(f"Equations for fixed_end {self.id} calculated")
+        logger.debug("Equations for fixed_end %s calculated", self.id)
         return eqns
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+
+class lru_cache:
+    """This class is a bounded cache with least recently used eviction and hit/miss counters"""
+
+    def __init__(self, max_size: int = 256) -> None:
+        if max_size < 0:
+            raise ValueError("max_size must be at least 0")
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def get(self, key: Hashable) -> Any:
+        """Returns the cached value or None, marking the entry as the most recently used"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits = self.hits + 1
+            return self.entries[key]
+        self.misses = self.misses + 1
+        return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_size == 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        logger.debug("Cache cleared")
+
+    def get_info(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+        }
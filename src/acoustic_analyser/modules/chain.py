@@ -0,0 +1,130 @@
+from acoustic_analyser.modules.assembly import get_source_blocks
+from acoustic_analyser.modules.bc import bc as bc_type
+from acoustic_analyser.modules.cache import lru_cache
+from acoustic_analyser.modules.instrumentation import stage_timer
+from acoustic_analyser.modules.member import member as member_type
+from acoustic_analyser.modules.rt_joint import _solve
+from typing import Dict, List, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+
+def get_chain_order(
+    members: Dict[int, member_type], constraints: Dict
+) -> List[Tuple[member_type, int, int]]:
+    """Walks a frame which is a serial chain, i.e. a BC at both ends and two member joints in between.
+    Gives (member, near constraint id, far constraint id) from one BC to the other, or None for any other topology
+    """
+    bcs = [
+        constraint
+        for constraint in constraints.values()
+        if isinstance(constraint, bc_type)
+    ]
+    if len(bcs) != 2 or len(bcs) + len(members) - 1 != len(constraints):
+        return None
+    if any(len(set(member.constraint_ids)) != 2 for member in members.values()):
+        return None
+
+    order = []
+    visited = set()
+    member = bcs[0].members[0]
+    near_id = bcs[0].id
+    while True:
+        if member.id in visited:
+            return None
+        visited.add(member.id)
+        constraint_ids = member.constraint_ids
+        far_id = (
+            constraint_ids[1] if constraint_ids[0] == near_id else constraint_ids[0]
+        )
+        order.append((member, near_id, far_id))
+
+        far_constraint = constraints[far_id]
+        if isinstance(far_constraint, bc_type):
+            break
+        others = [other for other in far_constraint.members if other is not member]
+        if len(others) != 1:
+            return None
+        member = others[0]
+        near_id = far_id
+
+    if len(visited) != len(members):
+        return None
+    return order
+
+
+class chain:
+    """This class evaluates the characteristic function of a serial chain by condensing it member by member.
+    Starting from the first BC, the reflection seen at the near end of a member is carried to its far end, R~ = P R P,
+    and through the joint to the next member, R = Rjj + Tij R~ (I - Rii R~)^-1 Tji.
+    The chain closes on the last BC with det(I - R_end R~), which vanishes at the natural frequencies.
+    The determinants of the (I - Rii R~) factors multiply it so that their poles cancel, the result being proportional
+    to the determinant of the global matrix while only 3x3 blocks are handled
+    """
+
+    def __init__(
+        self,
+        order: List[Tuple[member_type, int, int]],
+        constraints: Dict,
+        timer: stage_timer = None,
+    ) -> None:
+        self.timer = stage_timer() if timer is None else timer
+        self.order = order
+        self.constraints = constraints
+        # The propagation diagonals of all the members are evaluated at once when they share a store
+        stores = {id(member.store) for member, _, _ in order}
+        self.store = order[0][0].store if len(stores) == 1 else None
+        self.member_rows = np.array([member.index for member, _, _ in order], dtype=int)
+
+    def get_values(
+        self, w: np.ndarray, cache: lru_cache = None, state: tuple = None
+    ) -> np.ndarray:
+        """Gives the characteristic function for an array of omega, shaped (n_w,)"""
+        w = np.atleast_1d(np.asarray(w, dtype=float))
+        identity = np.eye(3)
+        # Blocks by kernel key, so each equivalence class is evaluated once
+        evaluated = {}
+        # The joint blocks are nan at omega = 0, which gives a nan value
+        with self.timer.time("chain"), np.errstate(invalid="ignore"):
+            if self.store is not None:
+                diagonals = self.store.get_propagation_diagonals(
+                    w=w, rows=self.member_rows
+                )
+            start = self.constraints[self.order[0][1]]
+            reflection = start.get_blocks(w=w)[0]
+            value = np.ones(len(w), dtype=complex)
+
+            for position, (member, _, far_id) in enumerate(self.order):
+                if self.store is not None:
+                    diagonal = diagonals[:, position]
+                else:
+                    diagonal = member.get_propagation_diagonal(w=w)
+                reflection_far = (
+                    diagonal[:, :, np.newaxis] * reflection * diagonal[:, np.newaxis, :]
+                )
+                constraint = self.constraints[far_id]
+                blocks = get_source_blocks(
+                    source=constraint,
+                    w=w,
+                    cache=cache,
+                    state=state,
+                    timer=self.timer,
+                    evaluated=evaluated,
+                )
+                if isinstance(constraint, bc_type):
+                    value = value * np.linalg.det(identity - blocks[0] @ reflection_far)
+                    break
+
+                r11, t21, t12, r22 = blocks
+                if constraint.members[0] is member:
+                    r_ii, t_ji, t_ij, r_jj = r11, t21, t12, r22
+                else:
+                    r_ii, t_ji, t_ij, r_jj = r22, t12, t21, r11
+                multiple_reflection = identity - r_ii @ reflection_far
+                value = value * np.linalg.det(multiple_reflection)
+                reflection = r_jj + t_ij @ reflection_far @ _solve(
+                    multiple_reflection, t_ji
+                )
+        return value
@@ -0,0 +1,176 @@
+from typing import Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+
+def get_singular_vectors(matrices: np.ndarray) -> Tuple[np.ndarray]:
+    """Gives the left and right singular vectors of the smallest singular value of a stack of matrices, each shaped (n, N).
+    At a natural frequency the right one is the mode in wave amplitudes and the left one spans the null space of A^H
+    """
+    u, _, vh = np.linalg.svd(matrices)
+    return u[:, :, -1], vh[:, -1, :].conj()
+
+
+def get_sensitivity(
+    left: np.ndarray,
+    right: np.ndarray,
+    derivative_1: np.ndarray,
+    derivative_2: np.ndarray,
+) -> np.ndarray:
+    """Gives -(u^H dA/dx1 v)/(u^H dA/dx2 v) for stacks of singular vectors and derivative matrices.
+    With x1 a parameter and x2 omega this is the rate of change of the natural frequency with the parameter,
+    first order perturbation of the smallest singular value of A
+    """
+    numerator = np.einsum("ni,nij,nj->n", left.conj(), derivative_1, right)
+    denominator = np.einsum("ni,nij,nj->n", left.conj(), derivative_2, right)
+    return -(numerator / denominator).real
+
+
+def get_mac(vectors_1: np.ndarray, vectors_2: np.ndarray) -> np.ndarray:
+    """Modal assurance criterion between every pair of mode vectors, shaped (n_1, n_2), 1 for the same mode and 0 for orthogonal ones"""
+    products = np.abs(vectors_1.conj() @ vectors_2.T) ** 2
+    norms_1 = np.sum(np.abs(vectors_1) ** 2, axis=1)
+    norms_2 = np.sum(np.abs(vectors_2) ** 2, axis=1)
+    return products / np.outer(norms_1, norms_2)
+
+
+def match_modes(mac: np.ndarray) -> np.ndarray:
+    """Gives for each previous mode (row) the index of the new mode (column) it continues into.
+    The assignment maximises the total MAC, so two modes crossing or veering are told apart by their shapes
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    rows, cols = linear_sum_assignment(mac, maximize=True)
+    matches = np.full(mac.shape[0], -1, dtype=int)
+    matches[rows] = cols
+    return matches
+
+
+def get_matched_mac(mac: np.ndarray, matches: np.ndarray) -> np.ndarray:
+    """MAC of each previous mode with the one it is matched to, 0 where it is not matched"""
+    matched_mac = np.zeros(len(matches))
+    matched = matches >= 0
+    matched_mac[matched] = mac[np.flatnonzero(matched), matches[matched]]
+    return matched_mac
+
+
+def get_continuation_dtype(label: str, n: int) -> np.dtype:
+    return np.dtype(
+        [
+            (label, float),
+            ("natural_frequencies", float, (n,)),
+            ("mac", float, (n,)),
+            ("iterations", int, (n,)),
+            ("rescanned", bool),
+        ]
+    )
+
+
+def _get_mode_vectors(frame, freq: np.ndarray) -> Tuple[np.ndarray]:
+    matrices = frame.get_equation_matrix(w=freq * 2 * np.pi)
+    return get_singular_vectors(matrices)
+
+
+def _get_rates(
+    frame, setter, value: float, freq: np.ndarray, relative_step: float
+) -> np.ndarray:
+    """Rates of change of the natural frequencies (Hz) with the parameter at value.
+    dA/dp is a central difference of the assembled matrices, dA/dw is analytic
+    """
+    w = freq * 2 * np.pi
+    left, right = _get_mode_vectors(frame, freq)
+    step = relative_step * max(abs(value), 1)
+    setter.set([value + step])
+    matrices_plus = frame.get_equation_matrix(w=w)
+    setter.set([value - step])
+    matrices_minus = frame.get_equation_matrix(w=w)
+    setter.set([value])
+    parameter_derivative = (matrices_plus - matrices_minus) / (2 * step)
+    omega_derivative = frame._get_assembler().assemble_derivative(w=w)
+    # The rate is per omega, the frequencies are in Hz
+    return get_sensitivity(left, right, parameter_derivative, omega_derivative) / (
+        2 * np.pi
+    )
+
+
+def run_continuation(
+    frame,
+    label: str,
+    values: np.ndarray,
+    natural_freqs: np.ndarray,
+    tol: float,
+    max_iter: int,
+    min_mac: float,
+    relative_step: float,
+    search_kwargs: dict,
+) -> np.ndarray:
+    """Follows the natural frequencies as the parameter goes through values, see frame.track_natural_frequencies.
+    Modes which cannot be matched even after a rescan are nan from there on
+    """
+    from acoustic_analyser.modules.parametric import parameter_setter
+
+    values = np.asarray(values, dtype=float)
+    setter = parameter_setter(frame, [label])
+    try:
+        setter.set([values[0]])
+        if natural_freqs is None:
+            natural_freqs = frame.get_natural_frequency(**search_kwargs)
+        freq = np.array(natural_freqs, dtype=float)
+        n = len(freq)
+        results = np.zeros(len(values), dtype=get_continuation_dtype(label, n))
+        results[label] = values
+        results["natural_frequencies"][0] = freq
+        results["mac"][0] = 1
+        tracked = np.isfinite(freq)
+        _, vectors = _get_mode_vectors(frame, freq[tracked])
+
+        for index in range(1, len(values)):
+            rates = _get_rates(
+                frame, setter, values[index - 1], freq[tracked], relative_step
+            )
+            setter.set([values[index]])
+            predicted = freq[tracked] + rates * (values[index] - values[index - 1])
+            records = frame.refine_natural_frequencies(
+                initial_guesses=predicted, tol=tol, max_iter=max_iter
+            )
+            unique = records["converged"] & (records["duplicate_of"] == -1)
+            candidates = records["frequency"][unique]
+            iterations = records["iterations"]
+
+            _, new_vectors = _get_mode_vectors(frame, candidates)
+            mac = get_mac(vectors, new_vectors)
+            matches = match_modes(mac)
+            matched_mac = get_matched_mac(mac, matches)
+            if np.any(matched_mac < min_mac):
+                # Modes lost by the predictor, e.g. two of them converging to the same root, are found by a rescan
+                logger.debug("Modes lost at %s = %s, rescanning", label, values[index])
+                results["rescanned"][index] = True
+                rescan = frame.get_natural_frequency(**search_kwargs)
+                candidates = np.union1d(candidates, rescan)
+                _, new_vectors = _get_mode_vectors(frame, candidates)
+                mac = get_mac(vectors, new_vectors)
+                matches = match_modes(mac)
+                matched_mac = get_matched_mac(mac, matches)
+
+            found = (matches >= 0) & (matched_mac >= min_mac)
+            tracked_ids = np.flatnonzero(tracked)
+            freq[tracked_ids[~found]] = np.nan
+            freq[tracked_ids[found]] = candidates[matches[found]]
+            results["natural_frequencies"][index] = freq
+            results["mac"][index, tracked_ids] = matched_mac
+            results["iterations"][index, tracked_ids] = iterations
+            tracked = np.isfinite(freq)
+            vectors = new_vectors[matches[found]]
+            logger.debug(
+                "%s = %s, %s modes tracked",
+                label,
+                values[index],
+                np.count_nonzero(tracked),
+            )
+            if not tracked.any():
+                break
+    finally:
+        setter.restore()
+    return results
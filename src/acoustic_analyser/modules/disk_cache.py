@@ -0,0 +1,118 @@
+from hashlib import sha256
+from typing import Dict, List
+import numpy as np
+import tempfile
+import logging
+import os
+
+logger = logging.getLogger("acoustic_analyser")
+
+# Bumped whenever the numeric equations change so that stale files are never read
+FORMAT_VERSION = b"rt-1"
+
+
+class disk_cache:
+    """This class is a content addressed cache of arrays on disk shared across runs and processes.
+    Each entry is an .npy file named by the hash of its inputs, read back memory mapped.
+    Files are written to a temporary name and moved in place with os.replace, so concurrent readers only ever see complete files.
+    The directory is kept below max_bytes by deleting the least recently used files, reads refresh the modification time.
+    The size of the directory is tracked with a running count of the bytes written, it is only scanned and pruned once
+    the count goes over max_bytes
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 2**30) -> None:
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be at least 0")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self.total_bytes = self.get_total_bytes()
+
+    def get_key(self, arrays: List[np.ndarray]) -> str:
+        """Hashes the inputs, floats are hashed by their exact bytes"""
+        digest = sha256(FORMAT_VERSION)
+        for array in arrays:
+            array = np.ascontiguousarray(array, dtype=float)
+            digest.update(str(array.shape).encode())
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".npy")
+
+    def get(self, key: str) -> np.ndarray:
+        """Returns the memory mapped array or None"""
+        path = self.get_path(key)
+        try:
+            array = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except (FileNotFoundError, ValueError, OSError):
+            # Missing, or pruned by another process in the meantime
+            self.misses = self.misses + 1
+            return None
+        self.hits = self.hits + 1
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        if self.max_bytes == 0:
+            return
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                np.save(file, array)
+            size = os.path.getsize(temporary_path)
+            os.replace(temporary_path, self.get_path(key))
+        except OSError:
+            logger.debug("Could not write %s to the disk cache", key)
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+        self.total_bytes = self.total_bytes + size
+        if self.total_bytes > self.max_bytes:
+            self.prune()
+
+    def _get_files(self) -> List[tuple]:
+        """Gives (modification time, size, path) of the files of the cache"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".npy"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def get_total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._get_files())
+
+    def prune(self) -> None:
+        """Deletes the least recently used files until the directory fits in max_bytes"""
+        files = self._get_files()
+        total = sum(size for _, size, _ in files)
+        self.total_bytes = total
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(files):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total = total - size
+            if total <= self.max_bytes:
+                break
+        self.total_bytes = total
+        logger.debug("Disk cache pruned to %s bytes", total)
+
+    def get_info(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "directory": self.directory,
+            "max_bytes": self.max_bytes,
+            "total_bytes": self.total_bytes,
+        }
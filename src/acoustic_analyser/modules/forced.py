@@ -0,0 +1,123 @@
+from acoustic_analyser.modules.assembly import assembler as assembler_type
+from acoustic_analyser.modules.member import member as member_type
+from acoustic_analyser.modules.member import A_PLUS, B_MINUS
+from typing import Dict, List, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+
+def get_source_amplitudes(
+    member: member_type, w: np.ndarray, transverse: float, axial: float
+) -> np.ndarray:
+    """Gives the amplitudes of the waves sent both ways by a point force inside a member, shaped (n_w, 3).
+    A transverse force F gives -iF/(4 EI k^3) for the propagating and -F/(4 EI k^3) for the evanescent bending wave,
+    an axial force F gives -iF/(2 EA k_l) for the longitudinal wave, k and k_l being the bending and longitudinal wave numbers
+    """
+    w = np.asarray(w, dtype=float)
+    bending_wave_number = (w / (member.C * member.K)) ** 0.5
+    longitudinal_wave_number = w / member.C
+    bending_stiffness = member.youngs_modulus * member.inertia
+    axial_stiffness = member.youngs_modulus * member.cross_section_area
+    bending = transverse / (4 * bending_stiffness * bending_wave_number**3)
+    return np.stack(
+        [
+            -1j * bending,
+            -bending + 0j,
+            -1j * axial / (2 * axial_stiffness * longitudinal_wave_number),
+        ],
+        axis=-1,
+    )
+
+
+def _check_position(member: member_type, position: float) -> None:
+    if not 0 <= position <= member.length:
+        raise ValueError(f"Position {position} is outside member {member.id}")
+
+
+def get_load_vectors(
+    assembler: assembler_type,
+    members: Dict[int, member_type],
+    loads: List[Tuple[int, float, float, float]],
+    w: np.ndarray,
+) -> np.ndarray:
+    """Gives the right hand sides of A x = f for the loads, shaped (n_w, N, n_loads).
+    A load (member id, position, transverse force, axial force) sends waves e both ways from the position x0,
+    measured from the end of the member at its lower constraint id. They enter its propagation equations as
+    P a+ - b+ = -P(L - x0) e and P b- - a- = -P(x0) e
+    """
+    load_vectors = np.zeros((len(w), assembler.size, len(loads)), dtype=complex)
+    for index, (member_id, position, transverse, axial) in enumerate(loads):
+        member = members[member_id]
+        _check_position(member, position)
+        amplitudes = get_source_amplitudes(member, w, transverse, axial)
+        row = assembler.member_row_offsets[member_id]
+        load_vectors[:, row : row + 3, index] = -(
+            member.get_propagation_diagonal(w=w, lengths=member.length - position)
+            * amplitudes
+        )
+        load_vectors[:, row + 3 : row + 6, index] = -(
+            member.get_propagation_diagonal(w=w, lengths=position) * amplitudes
+        )
+    return load_vectors
+
+
+def get_displacements(
+    assembler: assembler_type,
+    members: Dict[int, member_type],
+    loads: List[Tuple[int, float, float, float]],
+    observations: List[Tuple[int, float]],
+    w: np.ndarray,
+    solutions: np.ndarray,
+) -> Tuple[np.ndarray]:
+    """Gives the transverse (v) and axial (u) displacements at the observation points (member id, position),
+    each shaped (n_w, n_loads, n_observations). solutions are the wave amplitudes shaped (n_w, N, n_loads).
+    As in member.get_deformation the displacement sums the waves going both ways, which are propagated from the nearest
+    end of the member so that the evanescent waves stay bounded. On a loaded member the waves sent by the force are added
+    """
+    v = np.zeros((len(w), len(loads), len(observations)), dtype=complex)
+    u = np.zeros_like(v)
+    for index, (member_id, position) in enumerate(observations):
+        member = members[member_id]
+        _check_position(member, position)
+        offset = assembler.column_offsets[member_id]
+        a_plus = solutions[:, offset + A_PLUS : offset + A_PLUS + 3, :]
+        b_minus = solutions[:, offset + B_MINUS : offset + B_MINUS + 3, :]
+        forward = (
+            member.get_propagation_diagonal(w=w, lengths=position)[:, :, np.newaxis]
+            * a_plus
+        )
+        backward = (
+            member.get_propagation_diagonal(w=w, lengths=member.length - position)[
+                :, :, np.newaxis
+            ]
+            * b_minus
+        )
+        waves = forward + backward
+
+        for load_index, (load_member_id, load_position, transverse, axial) in enumerate(
+            loads
+        ):
+            if load_member_id != member_id:
+                continue
+            amplitudes = get_source_amplitudes(member, w, transverse, axial)
+            distance = abs(position - load_position)
+            waves[:, :, load_index] += (
+                member.get_propagation_diagonal(w=w, lengths=distance) * amplitudes
+            )
+        v[:, :, index] = waves[:, 0] + waves[:, 1]
+        u[:, :, index] = waves[:, 2]
+    return v, u
+
+
+def solve_forced(coeff_matrices: np.ndarray, load_vectors: np.ndarray) -> np.ndarray:
+    """Solves A x = f for a stack of frequencies, each matrix is factorised once for all the loads"""
+    return np.linalg.solve(coeff_matrices, load_vectors)
+
+
+def solve_forced_sparse(coeff_matrix, load_vectors: np.ndarray) -> np.ndarray:
+    """Sparse counterpart of solve_forced for a single frequency, load_vectors shaped (N, n_loads)"""
+    from scipy.sparse.linalg import splu
+
+    return splu(coeff_matrix).solve(load_vectors)
@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Dict
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+
+def debug_lazy(build_message: Callable[[], Any]) -> None:
+    """Logs a debug payload which is only built when the DEBUG level is enabled"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(build_message())
+
+
+class stage_timer:
+    """This class accumulates the wall time and the number of calls of the stages of an evaluation,
+    e.g. assembly, rt_solve, coefficient_extraction and determinant
+    """
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    @contextmanager
+    def time(self, stage: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[stage] = self.totals.get(stage, 0.0) + perf_counter() - start
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def reset(self) -> None:
+        self.totals.clear()
+        self.counts.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns the calls, total and mean time in seconds of every stage"""
+        stats = {}
+        for stage, total in self.totals.items():
+            stats[stage] = {
+                "calls": self.counts[stage],
+                "total": total,
+                "mean": total / self.counts[stage],
+            }
+        return stats
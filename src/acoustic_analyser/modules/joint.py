@@ -1,8 +1,12 @@
-from asyncio.log import logger
 from acoustic_analyser.modules.member import member as member_type
-from acoustic_analyser.modules.rt_joint import get_rt_of_two_member
-from sympy import Matrix
+from acoustic_analyser.modules.rt_joint import (
+    get_rt_of_two_member,
+    get_rt_of_two_member_numeric,
+    get_rt_derivative_of_two_member_numeric,
+)
+from acoustic_analyser.modules.member import get_member_properties
 from typing import List
+import numpy as np
 from math import pi
 import logging
 
@@ -29,6 +33,11 @@ class joint:
 class two_member(joint):
     """This class emulates a two-member joint"""
 
+    # The R/T matrices are costly, so the frame caches them
+    cacheable_blocks = True
+    # Optional on-disk cache of the R/T matrices, set by the frame
+    disk_cache = None
+
     def __init__(
         self, theta: float, member_1: member_type, member_2: member_type, id: int
     ) -> None:
@@ -47,6 +56,49 @@ class two_member(joint):
             m1=self.members[0], m2=self.members[1], theta=self.theta, w=w
         )
 
+    def get_block_layout(self) -> List[list]:
+        """Gives the position of the blocks of the equations as (row, member id, offset)
+        The first list holds the reflection/transmission blocks and the second one the identity blocks
+        """
+        member_1, member_2 = self.members
+        incoming_1, outgoing_1 = member_1.get_parameter_offsets(id=self.id)
+        incoming_2, outgoing_2 = member_2.get_parameter_offsets(id=self.id)
+        blocks = [
+            (0, member_1.id, incoming_1),
+            (0, member_2.id, incoming_2),
+            (3, member_1.id, incoming_1),
+            (3, member_2.id, incoming_2),
+        ]
+        identities = [(0, member_1.id, outgoing_1), (3, member_2.id, outgoing_2)]
+        return [blocks, identities]
+
+    def get_kernel_key(self) -> tuple:
+        """Joints with the same key have the same reflection and transmission matrices"""
+        return (
+            "two_member",
+            tuple(get_member_properties(self.members[0])),
+            tuple(get_member_properties(self.members[1])),
+            self.theta,
+        )
+
+    def get_blocks(self, w: np.ndarray) -> List[np.ndarray]:
+        """Gives the numeric reflection and transmission matrices for an array of omega in the order of get_block_layout"""
+        r11, r22, t12, t21 = get_rt_of_two_member_numeric(
+            m1=self.members[0],
+            m2=self.members[1],
+            theta=self.theta,
+            w=w,
+            cache=self.disk_cache,
+        )
+        return [r11, t21, t12, r22]
+
+    def get_block_derivatives(self, w: np.ndarray) -> List[np.ndarray]:
+        """Gives the derivatives of get_blocks with respect to omega"""
+        r11, r22, t12, t21 = get_rt_derivative_of_two_member_numeric(
+            m1=self.members[0], m2=self.members[1], theta=self.theta, w=w
+        )
+        return [r11, t21, t12, r22]
+
     def get_equations(self, w: float) -> list:
         """Gets the equations from the reflection and transmission matrices"""
         a_plus, a_minus = self.members[0].get_parameters(id=self.id, w=w)
@@ -66,5 +118,5 @@ class two_member(joint):
             - b_plus
         )
         eqns = matrix_reflect.col_join(matrix_transmit)
-        logger.debug(f"Equations for joint {self.id} calculated")
+        logger.debug("Equations for joint %s calculated", self.id)
         return eqns
@@ -0,0 +1,101 @@
+from acoustic_analyser.modules.member import PROPERTIES
+from json import load as json_load, loads as json_loads
+from typing import Dict, Iterator, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+# Header of the edge list CSV, each following row is one two member joint
+EDGE_HEADER = ["member_1_id", "member_2_id", "theta"]
+
+
+def iter_member_records(member_file: str) -> Iterator[Tuple[int, Dict[str, float]]]:
+    """Yields (id, properties) of the members of a member file.
+    A .json file holds a single object keyed by the ids 0, 1, 2, ...
+    A .ndjson/.jsonl file holds one object per line with an "id" and the properties, it is read line by line.
+    A .npz file holds one array per property, the ids being the indices unless an "id" array is given
+    """
+    if member_file.endswith(".npz"):
+        with np.load(member_file) as arrays:
+            properties = {name: arrays[name].astype(float) for name in PROPERTIES}
+            ids = (
+                arrays["id"] if "id" in arrays else np.arange(len(properties["length"]))
+            )
+        columns = [properties[name].tolist() for name in PROPERTIES]
+        for member_id, values in zip(ids.tolist(), zip(*columns)):
+            yield int(member_id), dict(zip(PROPERTIES, values))
+    elif member_file.endswith((".ndjson", ".jsonl")):
+        with open(member_file, "r") as ndjsonfile:
+            for line in ndjsonfile:
+                if not line.strip():
+                    continue
+                record = json_loads(line)
+                yield int(record.pop("id")), record
+    else:
+        with open(member_file, "r") as jsonfile:
+            member_dict = json_load(jsonfile)
+        for counter, (member_id, member_deets) in enumerate(member_dict.items()):
+            assert int(member_id) == counter, "ID format is not followed"
+            yield counter, member_deets
+
+
+def load_edges(constraint_file: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Gives the member ids and angles (degrees) of the two member joints of a constraint file.
+    A .npz file holds the member_1_id, member_2_id and theta arrays.
+    A CSV file starting with the EDGE_HEADER is an edge list with one joint per row.
+    Any other CSV file is the dense matrix of angles with -1 where there is no joint
+    """
+    if constraint_file.endswith(".npz"):
+        with np.load(constraint_file) as arrays:
+            return tuple(arrays[name] for name in EDGE_HEADER)
+
+    with open(constraint_file, "r") as csvfile:
+        first_line = csvfile.readline()
+    if [name.strip() for name in first_line.split(",")] == EDGE_HEADER:
+        edges = np.loadtxt(
+            constraint_file, delimiter=",", skiprows=1, ndmin=2, dtype=float
+        )
+        if len(edges) == 0:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int), np.empty(0)
+        return edges[:, 0].astype(int), edges[:, 1].astype(int), edges[:, 2]
+
+    matrix = np.loadtxt(constraint_file, delimiter=",", ndmin=2, dtype=float)
+    member_1_ids, member_2_ids = np.nonzero(matrix != -1)
+    return member_1_ids, member_2_ids, matrix[member_1_ids, member_2_ids]
+
+
+def get_unique_edges(
+    member_1_ids: np.ndarray, member_2_ids: np.ndarray, theta: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Drops the repeated joints between the same pair of members, e.g. both halves of a symmetric dense matrix.
+    A repeat with the same angle is skipped while one with a different angle is an error
+    """
+    member_1_ids = np.asarray(member_1_ids, dtype=int)
+    member_2_ids = np.asarray(member_2_ids, dtype=int)
+    theta = np.asarray(theta, dtype=float)
+    if np.any(member_1_ids == member_2_ids):
+        member_id = member_1_ids[member_1_ids == member_2_ids][0]
+        raise ValueError(f"Member {member_id} is joined to itself")
+
+    pairs = np.stack(
+        [
+            np.minimum(member_1_ids, member_2_ids),
+            np.maximum(member_1_ids, member_2_ids),
+        ],
+        axis=1,
+    )
+    _, first, inverse = np.unique(pairs, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    conflicting = theta != theta[first[inverse]]
+    if np.any(conflicting):
+        index = np.flatnonzero(conflicting)[0]
+        raise ValueError(
+            f"Members {pairs[index][0]} and {pairs[index][1]} are joined twice with different angles"
+        )
+    if len(first) < len(theta):
+        logger.debug("%s repeated joints skipped", len(theta) - len(first))
+
+    # The joints are kept in the order of the file as the constraint ids depend on it
+    keep = np.sort(first)
+    return member_1_ids[keep], member_2_ids[keep], theta[keep]
@@ -1,13 +1,139 @@
-from sympy import symbols, Matrix, I, E
 import logging
-from typing import List
+from typing import Dict, List
 import numpy as np
 
 logger = logging.getLogger("acoustic_analyser")
 
+# Offsets of the wave vectors inside the 12 parameters of a member
+A_PLUS, A_MINUS, B_PLUS, B_MINUS = 0, 3, 6, 9
+PARAMETER_COUNT = 12
+# Symbolic attributes which are only created, along with importing SymPy, when first used
+SYMBOLIC_ATTRIBUTES = ["params", "a_plus", "a_minus", "b_plus", "b_minus"]
+PROPERTIES = [
+    "length",
+    "density",
+    "youngs_modulus",
+    "cross_section_area",
+    "height",
+    "inertia",
+]
+
+
+def get_member_properties(member) -> List[float]:
+    """Gives the PROPERTIES of a member as a list, in a fixed order"""
+    return [getattr(member, name) for name in PROPERTIES]
+
+
+class member_store:
+    """This class stores the properties of many members as arrays, one row per member, along with C and K.
+    Members are thin views on a row, so the numeric work can be vectorised across members
+    """
+
+    def __init__(self, capacity: int = 16) -> None:
+        self.count = 0
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.empty(capacity) for name in PROPERTIES + ["C", "K"]
+        }
+        self.rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self.arrays["length"])
+        for name, array in self.arrays.items():
+            self.arrays[name] = np.resize(array, capacity)
+
+    def add(self, id: int, **properties: float) -> int:
+        """Adds a row for the member and gives its index"""
+        if self.count == len(self.arrays["length"]):
+            self._grow()
+        row = self.count
+        for name in PROPERTIES:
+            self.arrays[name][row] = properties[name]
+        self._set_derived(row)
+        self.rows[id] = row
+        self.count = self.count + 1
+        return row
+
+    def _set_derived(self, row: int) -> None:
+        arrays = self.arrays
+        arrays["C"][row] = (
+            arrays["youngs_modulus"][row] / arrays["density"][row]
+        ) ** 0.5
+        arrays["K"][row] = (
+            arrays["inertia"][row] / arrays["cross_section_area"][row]
+        ) ** 0.5
+
+    def get(self, name: str, row: int) -> float:
+        return self.arrays[name][row]
+
+    def set(self, name: str, row: int, value: float) -> None:
+        self.arrays[name][row] = value
+        self._set_derived(row)
+
+    def get_propagation_exponents(self, w: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Gives the exponents of the diagonals of the propagation matrices of the members in rows, shaped (n_w, n_rows, 3)"""
+        w = np.atleast_1d(np.asarray(w, dtype=float))[:, np.newaxis]
+        C, K = self.arrays["C"][rows], self.arrays["K"][rows]
+        alpha = (w * K / C) ** 0.5
+        beta = w * K / C
+        L_bar = self.arrays["length"][rows] / K
+        return np.stack(
+            [-1j * alpha * L_bar, -alpha * L_bar + 0j, -1j * beta * L_bar], axis=-1
+        )
+
+    def get_propagation_diagonals(self, w: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        return np.exp(self.get_propagation_exponents(w=w, rows=rows))
+
+    def get_propagation_diagonal_derivatives(
+        self, w: np.ndarray, rows: np.ndarray
+    ) -> np.ndarray:
+        """Gives the derivatives with respect to omega of the diagonals of get_propagation_diagonals"""
+        w = np.atleast_1d(np.asarray(w, dtype=float))[:, np.newaxis]
+        C, K = self.arrays["C"][rows], self.arrays["K"][rows]
+        alpha = (w * K / C) ** 0.5
+        L_bar = self.arrays["length"][rows] / K
+        # d(alpha)/dw = alpha / 2w and d(beta)/dw = K / C
+        exponent_derivatives = np.stack(
+            [
+                -1j * alpha * L_bar / (2 * w),
+                -alpha * L_bar / (2 * w) + 0j,
+                -1j * (K / C) * L_bar + 0 * w,
+            ],
+            axis=-1,
+        )
+        return (
+            self.get_propagation_diagonals(w=w[:, 0], rows=rows) * exponent_derivatives
+        )
+
+    def get_state(self) -> tuple:
+        """Hashable snapshot of the properties, used in the cache keys"""
+        return tuple(self.arrays[name][: self.count].tobytes() for name in PROPERTIES)
+
+
+def _get_store_property(name: str) -> property:
+    return property(
+        lambda self: self.store.get(name, self.index),
+        lambda self, value: self.store.set(name, self.index, value),
+    )
+
 
 class member:
-    """This class emulates a member with all its physical properties"""
+    """This class emulates a member with all its physical properties.
+    The properties live in a row of a member_store, a store of its own is created if none is given
+    """
+
+    cacheable_blocks = False
+
+    length = _get_store_property("length")
+    density = _get_store_property("density")
+    youngs_modulus = _get_store_property("youngs_modulus")
+    cross_section_area = _get_store_property("cross_section_area")
+    height = _get_store_property("height")
+    inertia = _get_store_property("inertia")
+    C = property(lambda self: self.store.get("C", self.index))
+    K = property(lambda self: self.store.get("K", self.index))
 
     def __init__(
         self,
@@ -17,8 +143,9 @@ class member:
         cross_section_area: float,
         height: float,
         inertia: float,
-        omega: symbols,
         id: int,
+        omega=None,
+        store: member_store = None,
     ) -> None:
         if length <= 0:
             raise ValueError("length must be greater than 0")
@@ -30,22 +157,27 @@ class member:
             raise ValueError("cross_section_area must be greater than 0")
         if height <= 0:
             raise ValueError("height must be greater than 0")
-        self.length = length
-        self.density = density
-        self.youngs_modulus = youngs_modulus
-        self.height = height
-        self.cross_section_area = cross_section_area
-        self.inertia = inertia
+        self.store = member_store(capacity=1) if store is None else store
+        self.index = self.store.add(
+            id=id,
+            length=length,
+            density=density,
+            youngs_modulus=youngs_modulus,
+            cross_section_area=cross_section_area,
+            height=height,
+            inertia=inertia,
+        )
         self.id = id
         self.omega = omega
 
-        self.C = (self.youngs_modulus / self.density) ** 0.5
-        self.K = (self.inertia / self.cross_section_area) ** 0.5
-
         self.constraint_count = 0
         self.constraint_ids = []
 
-        self.set_parameters()
+    def __getattr__(self, name: str):
+        if name in SYMBOLIC_ATTRIBUTES:
+            self.set_parameters()
+            return self.__dict__[name]
+        raise AttributeError(f"'member' object has no attribute '{name}'")
 
     def check_constraint_count(self) -> bool:
         """Each member can have only 2 constraints added to it at present"""
@@ -75,10 +207,12 @@ class member:
             ]
         )
         propagation_matrix = np.stack([propagation_matrix_finder(x) for x in L_bar])
-        logger.debug(f"Propagation Matrix Calculated for member {self.id}")
+        logger.debug("Propagation Matrix Calculated for member %s", self.id)
         return propagation_matrix
 
     def set_parameters(self) -> None:
+        from sympy import symbols, Matrix
+
         a_b_plus, a_e_plus, a_b_minus, a_e_minus, a_l_plus, a_l_minus = symbols(
             "a_b^+{i}, a_e^+{i}, a_b^-{i}, a_e^-{i}, a_l^+{i}, a_l^-{i}".format(
                 i=self.id
@@ -109,11 +243,14 @@ class member:
 
         self.b_plus: Matrix = Matrix([b_b_plus, b_e_plus, b_l_plus])
         self.b_minus: Matrix = Matrix([b_b_minus, b_e_minus, b_l_minus])
-        logger.debug(f"Parameters set for member {self.id}")
+        logger.debug("Parameters set for member %s", self.id)
 
-    def get_all_parameters(self) -> List[symbols]:
+    def get_all_parameters(self) -> list:
         return self.params
 
+    def get_parameter_count(self) -> int:
+        return PARAMETER_COUNT
+
     def get_parameters(self, w: float, id: int) -> list:
         """This function gives back the set of parameters to be used.
         It corrects for the sign convention of the constraint when returning parameters
@@ -125,39 +262,101 @@ class member:
         else:
             return [self.a_minus, self.a_plus]
 
+    def get_parameter_offsets(self, id: int) -> List[int]:
+        """Numeric counterpart of get_parameters.
+        Gives the offsets of the incoming and outgoing wave vectors within the parameters of the member
+        """
+        if id == max(self.constraint_ids):
+            return [B_PLUS, B_MINUS]
+        else:
+            return [A_MINUS, A_PLUS]
+
+    def get_block_layout(self) -> List[list]:
+        """Gives the position of the blocks of the propagation equations as (row, member id, offset)
+        The first list holds the propagation blocks and the second one the identity blocks
+        """
+        blocks = [(0, self.id, A_PLUS), (3, self.id, B_MINUS)]
+        identities = [(0, self.id, B_PLUS), (3, self.id, A_MINUS)]
+        return [blocks, identities]
+
+    def get_propagation_exponent(
+        self, w: np.ndarray, lengths: np.ndarray = None
+    ) -> np.ndarray:
+        """Gives the exponents of the diagonal of the propagation matrix, shaped (n, 3).
+        It runs over an array of omega for the whole member or over an array of lengths along it
+        """
+        w = np.asarray(w, dtype=float)
+        alpha = (w * self.K / self.C) ** 0.5
+        beta = w * self.K / self.C
+        if lengths is None:
+            lengths = self.length
+        L_bar = np.asarray(lengths, dtype=float) / self.K
+        return np.stack(
+            [-1j * alpha * L_bar, -alpha * L_bar + 0j, -1j * beta * L_bar], axis=-1
+        )
+
+    def get_propagation_diagonal(
+        self, w: np.ndarray, lengths: np.ndarray = None
+    ) -> np.ndarray:
+        """Gives the diagonal of the propagation matrix, shaped (n, 3), see get_propagation_exponent"""
+        return np.exp(self.get_propagation_exponent(w=w, lengths=lengths))
+
+    def get_kernel_key(self) -> tuple:
+        """Members with the same key have the same propagation blocks"""
+        return ("member", self.length, self.K, self.C)
+
+    def get_blocks(self, w: np.ndarray) -> List[np.ndarray]:
+        """Gives the numeric propagation blocks for an array of omega in the order of get_block_layout"""
+        diagonal = self.get_propagation_diagonal(w=w)
+        propagation_matrix = np.zeros(diagonal.shape + (3,), dtype=complex)
+        propagation_matrix[:, [0, 1, 2], [0, 1, 2]] = diagonal
+        return [propagation_matrix, propagation_matrix]
+
+    def get_block_derivatives(self, w: np.ndarray) -> List[np.ndarray]:
+        """Gives the derivatives of get_blocks with respect to omega"""
+        w = np.atleast_1d(np.asarray(w, dtype=float))
+        diagonal = self.store.get_propagation_diagonal_derivatives(
+            w=w, rows=np.array([self.index])
+        )[:, 0]
+        propagation_matrix = np.zeros(diagonal.shape + (3,), dtype=complex)
+        propagation_matrix[:, [0, 1, 2], [0, 1, 2]] = diagonal
+        return [propagation_matrix, propagation_matrix]
+
     def get_equations(self, w: float):
         self.propagation_matrix_subs = self.get_propagation_matrix(
             w=w, lengths=[self.length]
         )[0]
         matrix_forward = self.propagation_matrix_subs * self.a_plus - self.b_plus
         matrix_backward = self.propagation_matrix_subs * self.b_minus - self.a_minus
-        logger.debug(f"Propagation for id:{self.id} calculated")
+        logger.debug("Propagation for id:%s calculated", self.id)
         eqns = matrix_forward.col_join(matrix_backward)
         return eqns
 
+    def get_phase_rate(self, w: float) -> float:
+        """Rate of change with omega of the phase accumulated by the bending and longitudinal waves over the member"""
+        bending_rate = self.length / (2 * (w * self.K * self.C) ** 0.5)
+        longitudinal_rate = self.length / self.C
+        return bending_rate + longitudinal_rate
+
     def get_non_dimensional_freq(self, w: float) -> float:
         omega = (w * self.K / self.C) ** 0.5
         return omega
 
     def get_deformation(
-        self, w: float, lengths: List[float], subs_dict: dict, id: int
+        self, w: float, lengths: List[float], parameters: np.ndarray, id: int
     ) -> List[np.ndarray]:
-        lengths = np.array(lengths)
-
-        a_minus, a_plus = self.get_parameters(w=w, id=id)
-        # a_minus, a_plus = (self.a_minus, self.a_plus)
-
-        propagation_matrix_subs = self.get_propagation_matrix(w=w, lengths=lengths)
-        propagation_matrix_inv_subs = np.linalg.inv(propagation_matrix_subs)
-        a_plus_subs = np.matrix(a_plus.subs(subs_dict), dtype=complex)
-        a_minus_subs = np.matrix(a_minus.subs(subs_dict), dtype=complex)
-        v = (
-            np.matmul(np.array([1, 1, 0]), propagation_matrix_subs) * a_plus_subs
-            + np.matmul(np.array([1, 1, 0]), propagation_matrix_inv_subs) * a_minus_subs
-        )
-        u = (
-            np.matmul(np.array([0, 0, 1]), propagation_matrix_subs) * a_plus_subs
-            + np.matmul(np.array([0, 0, 1]), propagation_matrix_inv_subs) * a_minus_subs
-        )
+        """Gives the transverse (v) and axial (u) deformation at the lengths measured from the constraint id.
+        parameters are the 12 complex wave amplitudes of the member, in the order of its params
+        """
+        incoming, outgoing = self.get_parameter_offsets(id=id)
+        parameters = np.asarray(parameters, dtype=complex)
 
+        # The propagation matrix is diagonal, so its inverse is the exponential of the negated exponents
+        exponent = self.get_propagation_exponent(w=w, lengths=lengths)
+        waves = (
+            np.exp(exponent) * parameters[outgoing : outgoing + 3]
+            + np.exp(-exponent) * parameters[incoming : incoming + 3]
+        )
+        v = waves[:, 0] + waves[:, 1]
+        u = waves[:, 2]
         return [v, u]
@@ -0,0 +1,31 @@
+from typing import Dict
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+
+def get_null_space(
+    matrix: np.ndarray, atol: float = 1e-05, rtol: float = 1e-05
+) -> Dict:
+    """Finds the null space of the matrix from its singular value decomposition.
+    Every right singular vector whose singular value is below atol + rtol times the largest one is kept,
+    so repeated or close modes give a null space of several dimensions.
+    The vectors are the columns of "vectors" ordered from the smallest singular value, with the residual norm |A v| of each.
+    Each vector is rotated so that its largest entry is real, which fixes the arbitrary phase of the SVD
+    """
+    _, singular_values, vh = np.linalg.svd(matrix)
+    tolerance = atol + rtol * singular_values[0]
+    dimension = int(np.sum(singular_values <= tolerance))
+
+    vectors = np.conj(vh[::-1][:dimension]).T
+    largest = vectors[np.abs(vectors).argmax(axis=0), np.arange(dimension)]
+    vectors = vectors * (np.abs(largest) / largest)
+    residuals = np.linalg.norm(matrix @ vectors, axis=0)
+    logger.debug("Null space of dimension %s with residuals %s", dimension, residuals)
+    return {
+        "vectors": vectors,
+        "singular_values": singular_values[::-1][:dimension],
+        "residuals": residuals,
+        "dimension": dimension,
+    }
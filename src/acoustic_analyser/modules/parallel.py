@@ -0,0 +1,103 @@
+from acoustic_analyser.modules.parametric import run_study
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+# Frame rebuilt from its description in every worker process
+worker_frame = None
+
+
+def _init_worker(description: Dict) -> None:
+    """Rebuilds the frame once per worker process instead of pickling the SymPy objects"""
+    global worker_frame
+    from acoustic_analyser.main import frame
+
+    worker_frame = frame.from_description(description)
+
+
+def _get_determinants(freq: np.ndarray, chunk_size: int, objective: str) -> np.ndarray:
+    return worker_frame.get_determinants(
+        w=freq * np.pi * 2, chunk_size=chunk_size, objective=objective
+    )
+
+
+def _run_study(
+    points: Dict[str, np.ndarray], n: int, search_kwargs: Dict
+) -> np.ndarray:
+    return run_study(
+        frame=worker_frame, points=points, n=n, search_kwargs=search_kwargs
+    )
+
+
+def split_frequencies(
+    freq: np.ndarray, chunk_size: int, workers: int
+) -> List[np.ndarray]:
+    """Splits the frequencies into contiguous sub-ranges, one per worker.
+    The sub-ranges start on multiples of chunk_size so that the chunks match the serial run exactly
+    """
+    chunk_count = int(np.ceil(len(freq) / chunk_size))
+    chunks_per_worker = max(int(np.ceil(chunk_count / workers)), 1)
+    step = chunks_per_worker * chunk_size
+    return [freq[start : start + step] for start in range(0, len(freq), step)]
+
+
+def get_determinants_parallel(
+    description: Dict,
+    freq: np.ndarray,
+    chunk_size: int,
+    workers: int,
+    objective: str = "det",
+) -> np.ndarray:
+    """Evaluates the determinants of the frame over the frequencies using a pool of processes.
+    The results are merged back in frequency order
+    """
+    sub_ranges = split_frequencies(freq=freq, chunk_size=chunk_size, workers=workers)
+    logger.debug("Frequency scan split into %s sub-ranges", len(sub_ranges))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(description,)
+    ) as executor:
+        outputs = list(
+            executor.map(
+                _get_determinants,
+                sub_ranges,
+                [chunk_size] * len(sub_ranges),
+                [objective] * len(sub_ranges),
+            )
+        )
+    if len(outputs) == 0:
+        return np.empty(0, dtype=complex)
+    return np.concatenate(outputs)
+
+
+def run_study_parallel(
+    description: Dict,
+    points: Dict[str, np.ndarray],
+    n: int,
+    workers: int,
+    search_kwargs: Dict,
+    batch_size: int = 1,
+) -> np.ndarray:
+    """Runs a parametric study with a pool of processes, each worker rebuilding the frame once.
+    The points are sent batch_size at a time and the results are merged back in the order of the points
+    """
+    count = len(next(iter(points.values())))
+    batches = [
+        {label: values[start : start + batch_size] for label, values in points.items()}
+        for start in range(0, count, batch_size)
+    ]
+    logger.debug("Parametric study split into %s batches", len(batches))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(description,)
+    ) as executor:
+        outputs = list(
+            executor.map(
+                _run_study,
+                batches,
+                [n] * len(batches),
+                [search_kwargs] * len(batches),
+            )
+        )
+    return np.concatenate(outputs)
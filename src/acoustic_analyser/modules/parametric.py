@@ -0,0 +1,107 @@
+from acoustic_analyser.modules.joint import two_member as two_member_type
+from acoustic_analyser.modules.member import PROPERTIES
+from typing import Dict, List, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+
+def parse_label(label: str) -> Tuple[str, int, str]:
+    """Splits a parameter label into (kind, id, name).
+    Member properties are labelled "member_<id>_<property>", e.g. member_0_length, and joint angles "joint_<id>_theta"
+    """
+    parts = label.split("_", 2)
+    if len(parts) != 3 or parts[0] not in ["member", "joint"] or not parts[1].isdigit():
+        raise ValueError(
+            f"{label} is not of the form member_<id>_<property> or joint_<id>_theta"
+        )
+    kind, id, name = parts[0], int(parts[1]), parts[2]
+    if kind == "member" and name not in PROPERTIES:
+        raise ValueError(f"{name} is not a member property, use one of {PROPERTIES}")
+    if kind == "joint" and name != "theta":
+        raise ValueError("Only the theta of a joint can be varied")
+    return kind, id, name
+
+
+def get_points(
+    parameters: Dict[str, np.ndarray], grid: bool = True
+) -> Dict[str, np.ndarray]:
+    """Gives the values of every parameter at each point of the study, flattened to one entry per point.
+    With grid set all the combinations of the arrays are taken, otherwise the arrays are zipped and must have the same length
+    """
+    labels = list(parameters)
+    values = [
+        np.atleast_1d(np.asarray(parameters[label], dtype=float)) for label in labels
+    ]
+    if grid:
+        values = [array.reshape(-1) for array in np.meshgrid(*values, indexing="ij")]
+    elif len({len(array) for array in values}) > 1:
+        raise ValueError(
+            "The parameter arrays must have the same length unless grid is set"
+        )
+    return dict(zip(labels, values))
+
+
+def get_study_dtype(labels: List[str], n: int) -> np.dtype:
+    return np.dtype(
+        [(label, float) for label in labels] + [("natural_frequencies", float, (n,))]
+    )
+
+
+class parameter_setter:
+    """This class changes the properties of a frame in place, the topology and so the assembly layout being kept.
+    The original values are saved on creation and put back by restore
+    """
+
+    def __init__(self, frame, labels: List[str]) -> None:
+        self.frame = frame
+        self.targets = []
+        for label in labels:
+            kind, id, name = parse_label(label)
+            if kind == "member":
+                if id not in frame.members:
+                    raise ValueError(f"There is no member {id}")
+                self.targets.append((frame.members[id], name, 1))
+            else:
+                constraint = frame.constraints.get(id)
+                if not isinstance(constraint, two_member_type):
+                    raise ValueError(f"Constraint {id} is not a two member joint")
+                # Angles are given in degrees as in frame.two_member_joint
+                self.targets.append((constraint, name, np.pi / 180))
+        self.original = [getattr(target, name) for target, name, _ in self.targets]
+
+    def set(self, values: List[float]) -> None:
+        for (target, name, scale), value in zip(self.targets, values):
+            setattr(target, name, value * scale)
+
+    def restore(self) -> None:
+        for (target, name, _), value in zip(self.targets, self.original):
+            setattr(target, name, value)
+
+
+def run_study(
+    frame, points: Dict[str, np.ndarray], n: int, search_kwargs: Dict
+) -> np.ndarray:
+    """Searches the first n natural frequencies at each point, the frame is left as it was.
+    Points where fewer than n natural frequencies are found are padded with nan
+    """
+    labels = list(points)
+    count = len(points[labels[0]]) if labels else 0
+    results = np.empty(count, dtype=get_study_dtype(labels, n))
+    results["natural_frequencies"] = np.nan
+    setter = parameter_setter(frame, labels)
+    try:
+        for index in range(count):
+            values = [points[label][index] for label in labels]
+            setter.set(values)
+            for label, value in zip(labels, values):
+                results[label][index] = value
+            natural_frequencies = frame.get_natural_frequency(n=n, **search_kwargs)
+            results["natural_frequencies"][
+                index, : len(natural_frequencies)
+            ] = natural_frequencies
+            logger.debug("Parametric point %s/%s done", index + 1, count)
+    finally:
+        setter.restore()
+    return results
@@ -0,0 +1,233 @@
+from typing import Callable, Dict, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+# Diagnostics of every initial guess refined by newton_refine, duplicate_of is -1 for the first guess reaching a root
+NEWTON_RECORD = np.dtype(
+    [
+        ("initial_guess", float),
+        ("frequency", float),
+        ("iterations", int),
+        ("step", float),
+        ("converged", bool),
+        ("duplicate_of", int),
+    ]
+)
+
+
+def is_phase_flip(output_1: complex, output_2: complex) -> bool:
+    """The determinant changes phase by more than 90 degrees, i.e. its projection on output_1 changes sign"""
+    return np.real(output_2 * np.conj(output_1)) < 0
+
+
+def is_minimum(output_0: complex, output_1: complex, output_2: complex) -> bool:
+    """|det| has a local minimum at the middle point"""
+    return np.abs(output_1) < np.abs(output_0) and np.abs(output_1) < np.abs(output_2)
+
+
+class root_finder:
+    """This class refines the roots of the characteristic determinant inside brackets.
+    All evaluations are cached so that bracket endpoints and revisited points are never recomputed.
+    A refined root is accepted when |det| drops by rtol relative to the bracket endpoints and, if indicator is given,
+    when indicator(root), a normalised measure of singularity such as the smallest to largest singular value ratio, is below atol
+    """
+
+    def __init__(
+        self,
+        func: Callable[[float], complex],
+        method: str = "brent",
+        xtol: float = 1e-10,
+        max_iter: int = 100,
+        atol: float = 1e-08,
+        rtol: float = 1e-05,
+        indicator: Callable[[float], float] = None,
+    ) -> None:
+        if method not in ["brent", "illinois"]:
+            raise ValueError("method must be either brent or illinois")
+        self.func = func
+        self.indicator = indicator
+        self.method = method
+        self.xtol = xtol
+        self.max_iter = max_iter
+        self.atol = atol
+        self.rtol = rtol
+        self.cache: Dict[float, complex] = {}
+        self.function_calls = 0
+
+    def add(self, freq: float, output: complex) -> None:
+        """Adds an evaluation done elsewhere, e.g. on the scan grid"""
+        self.cache[float(freq)] = output
+
+    def evaluate(self, freq: float) -> complex:
+        freq = float(freq)
+        if freq not in self.cache:
+            self.cache[freq] = self.func(freq)
+            self.function_calls = self.function_calls + 1
+        return self.cache[freq]
+
+    def is_root(self, output: complex, output_1: complex, output_2: complex) -> bool:
+        """The root is accepted when |det| is negligible compared to the bracket endpoints.
+        The test is relative only, as |det| has no natural scale and is far below any absolute tolerance on large frames
+        """
+        scale = max(np.abs(output_1), np.abs(output_2))
+        return np.abs(output) <= self.rtol * scale
+
+    def is_confirmed(self, freq: float) -> bool:
+        """The root is confirmed by the indicator, which unlike |det| has a scale, so that atol is meaningful"""
+        if self.indicator is None:
+            return True
+        return np.abs(self.indicator(freq)) <= self.atol
+
+    def _illinois(
+        self, func: Callable, x1: float, x2: float
+    ) -> Tuple[float, int, bool]:
+        """Illinois variant of the regula falsi method"""
+        f1, f2 = func(x1), func(x2)
+        side = 0
+        x = x1
+        for iteration in range(1, self.max_iter + 1):
+            x = (x1 * f2 - x2 * f1) / (f2 - f1)
+            f = func(x)
+            if f == 0:
+                return x, iteration, True
+            if np.sign(f) == np.sign(f2):
+                x2, f2 = x, f
+                if side == -1:
+                    f1 = f1 / 2
+                side = -1
+            else:
+                x1, f1 = x, f
+                if side == 1:
+                    f2 = f2 / 2
+                side = 1
+            if abs(x2 - x1) <= self.xtol:
+                return x, iteration, True
+        return x, self.max_iter, False
+
+    def refine(self, freq_1: float, freq_2: float) -> Dict:
+        """Refines a root bracketed by a phase flip of the determinant between freq_1 and freq_2.
+        The determinant is projected on the secant direction which gives a real valued function changing sign in the bracket
+        """
+        calls_before = self.function_calls
+        output_1, output_2 = self.evaluate(freq_1), self.evaluate(freq_2)
+        direction = np.conj(output_2 - output_1) / np.abs(output_2 - output_1)
+        scaled_det = lambda freq: np.real(self.evaluate(freq) * direction)
+
+        if self.method == "brent":
+            from scipy.optimize import brentq
+
+            try:
+                root, info = brentq(
+                    scaled_det,
+                    freq_1,
+                    freq_2,
+                    xtol=self.xtol,
+                    maxiter=self.max_iter,
+                    full_output=True,
+                    disp=False,
+                )
+                iterations, converged = info.iterations, info.converged
+            except ValueError:
+                # The determinant is nan inside the bracket, e.g. on singular joint equations
+                logger.debug(
+                    "Brent method stopped on a nan in [%s, %s]", freq_1, freq_2
+                )
+                root, iterations, converged = (
+                    (freq_1 + freq_2) / 2,
+                    self.max_iter,
+                    False,
+                )
+        else:
+            root, iterations, converged = self._illinois(scaled_det, freq_1, freq_2)
+
+        output = self.evaluate(root)
+        converged = bool(converged) and self.is_root(output, output_1, output_2)
+        return {
+            "frequency": root,
+            "bracket": (freq_1, freq_2),
+            "determinant": output,
+            "iterations": iterations,
+            "function_calls": self.function_calls - calls_before,
+            "converged": converged and self.is_confirmed(root),
+        }
+
+    def minimise(self, freq_1: float, freq_2: float) -> Dict:
+        """Refines a root sitting on a minimum of |det| between freq_1 and freq_2 without a phase flip,
+        as happens for roots very close to each other
+        """
+        from scipy.optimize import minimize_scalar
+
+        calls_before = self.function_calls
+        output_1, output_2 = self.evaluate(freq_1), self.evaluate(freq_2)
+        result = minimize_scalar(
+            lambda freq: np.abs(self.evaluate(freq)),
+            bounds=(freq_1, freq_2),
+            method="bounded",
+            options={"xatol": self.xtol, "maxiter": self.max_iter},
+        )
+        output = self.evaluate(result.x)
+        converged = bool(result.success) and self.is_root(output, output_1, output_2)
+        return {
+            "frequency": result.x,
+            "bracket": (freq_1, freq_2),
+            "determinant": output,
+            "iterations": result.nit,
+            "function_calls": self.function_calls - calls_before,
+            "converged": converged and self.is_confirmed(result.x),
+        }
+
+
+def newton_refine(
+    log_derivative: Callable[[np.ndarray], np.ndarray],
+    guesses: np.ndarray,
+    tol: float = 1e-09,
+    max_iter: int = 100,
+    duplicate_rtol: float = 1e-06,
+) -> np.ndarray:
+    """Refines many initial guesses at once with the Newton method, returning an array of NEWTON_RECORD.
+    log_derivative gives det'/det for an array of frequencies, it is called once per iteration for all the guesses
+    which have not converged yet, the Newton step being det/det' = 1/(det'/det).
+    Converged guesses within duplicate_rtol of each other are the same root and point to the first of them.
+    A guess whose step is not finite, e.g. on a singular matrix, is dropped as not converged
+    """
+    records = np.zeros(len(guesses), dtype=NEWTON_RECORD)
+    records["initial_guess"] = guesses
+    records["frequency"] = guesses
+    records["step"] = np.nan
+    records["duplicate_of"] = -1
+    active = np.arange(len(guesses))
+
+    for iteration in range(1, max_iter + 1):
+        if len(active) == 0:
+            break
+        step = (1 / log_derivative(records["frequency"][active])).real
+        finite = np.isfinite(step)
+        records["step"][active] = np.abs(step)
+        records["iterations"][active] = iteration
+        records["frequency"][active[finite]] = np.abs(
+            records["frequency"][active[finite]] - step[finite]
+        )
+        converged = finite & (np.abs(step) < tol)
+        records["converged"][active[converged]] = True
+        active = active[finite & ~converged]
+        logger.debug("Newton iteration %s, %s guesses left", iteration, len(active))
+
+    # Sorted by frequency, a gap larger than duplicate_rtol starts a new root
+    converged = np.flatnonzero(records["converged"])
+    order = converged[np.argsort(records["frequency"][converged], kind="stable")]
+    freq = records["frequency"][order]
+    new_root = np.ones(len(order), dtype=bool)
+    new_root[1:] = np.diff(freq) > duplicate_rtol * freq[1:]
+    for cluster in np.split(order, np.flatnonzero(new_root)[1:]):
+        if len(cluster) > 1:
+            first = cluster.min()
+            records["duplicate_of"][cluster[cluster != first]] = first
+    logger.debug(
+        "%s of %s guesses converged to %s roots",
+        len(converged),
+        len(guesses),
+        np.count_nonzero(records["duplicate_of"][converged] == -1),
+    )
+    return records
@@ -1,6 +1,8 @@
-from sympy import Matrix
 from pickle import load as pickle_load
+from json import load as json_load
 from acoustic_analyser.modules.member import member as member_type
+from typing import Dict
+import numpy as np
 import logging
 import os
 
@@ -8,19 +10,44 @@ base_path = os.path.join(os.path.dirname(__file__), "..", "equations")
 
 logger = logging.getLogger("acoustic_analyser")
 
-file = open(os.path.join(base_path, "fixed_end.pkl"), mode="rb")
-reflection_fixed = pickle_load(file)
-file.close()
+# The equation files are only loaded on first use
+reflections: Dict = {}
+numeric_equations: Dict = {}
 
-file = open(os.path.join(base_path, "free_end.pkl"), mode="rb")
-reflection_free = pickle_load(file)
-file.close()
-logger.debug("Boundary Condition Equation Files Loaded")
 
+def load_numeric_equations() -> Dict:
+    """Loads the numeric form of the equation files, which does not need SymPy"""
+    if not numeric_equations:
+        with open(os.path.join(base_path, "numeric.json"), "r") as file:
+            numeric_equations.update(json_load(file))
+        logger.debug("Numeric Equation Files Loaded")
+    return numeric_equations
 
-def get_r_of_free_end(m1: member_type) -> Matrix:
-    return reflection_free
 
+def _get_reflection(name: str):
+    if name not in reflections:
+        with open(os.path.join(base_path, f"{name}.pkl"), mode="rb") as file:
+            reflections[name] = pickle_load(file)
+        logger.debug("Boundary Condition Equation Files Loaded")
+    return reflections[name]
 
-def get_r_of_fixed_end(m1: member_type) -> Matrix:
-    return reflection_fixed
+
+def _get_reflection_array(name: str) -> np.ndarray:
+    real, imag = load_numeric_equations()[name]
+    return np.array(real) + 1j * np.array(imag)
+
+
+def get_r_of_free_end(m1: member_type):
+    return _get_reflection("free_end")
+
+
+def get_r_of_fixed_end(m1: member_type):
+    return _get_reflection("fixed_end")
+
+
+def get_r_array_of_free_end(m1: member_type) -> np.ndarray:
+    return _get_reflection_array("free_end")
+
+
+def get_r_array_of_fixed_end(m1: member_type) -> np.ndarray:
+    return _get_reflection_array("fixed_end")
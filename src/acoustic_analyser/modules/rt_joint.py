@@ -1,55 +1,53 @@
-from sympy import symbols, I, Matrix
-from sympy.core.parameters import evaluate
 from pickle import load as pickle_load
 from acoustic_analyser.modules.member import member as member_type
-from typing import List, Tuple
+from acoustic_analyser.modules.rt_bc import load_numeric_equations
+from acoustic_analyser.modules.disk_cache import disk_cache
+from acoustic_analyser.modules.member import get_member_properties
+from typing import Tuple
+import numpy as np
 import logging
 import os
 
 logger = logging.getLogger("acoustic_analyser")
 
-
-a1, b1, c1, d1 = symbols("a_traveling,  b_traveling, c_traveling, d_traveling")
-a2, b2, c2, d2 = symbols("a_evanescent, b_evanescent, c_evanescent, d_evanescent")
-density1, area1, E1, I1, L1, H1 = symbols("density1, area1, E1, I1, L1, H1")
-density2, area2, E2, I2, L2, H2 = symbols("density2, area2, E2, I2, L2, H2")
-theta_sym = symbols("theta")
-w_sym = symbols("w")
+# Names of the symbols the joint equations depend on, in the order of the kernel arguments
+arguments = ["density1", "area1", "E1", "I1", "L1", "H1"]
+arguments.extend(["density2", "area2", "E2", "I2", "L2", "H2", "theta", "w"])
 
 base_path = os.path.join(os.path.dirname(__file__), "..", "equations")
-file = open(os.path.join(base_path, "two_member.pkl"), mode="rb")
-eqns = pickle_load(file)
-logger.debug("Joint Equation Files Loaded")
-file.close()
-
-
-def _subs(
-    eqns: List[Matrix], m1: member_type, m2: member_type, theta: float, w: float
-) -> list:
-    subs_dict = {
-        density1: m1.density,
-        area1: m1.cross_section_area,
-        E1: m1.youngs_modulus,
-        I1: m1.inertia,
-        L1: m1.length,
-        H1: m1.height,
-        density2: m2.density,
-        area2: m2.cross_section_area,
-        E2: m2.youngs_modulus,
-        I2: m2.inertia,
-        L2: m2.length,
-        H2: m2.height,
-        theta_sym: theta,
-        w_sym: w,
-    }
-    eqns_subs: List[Matrix] = [None] * len(eqns)
+
+# The SymPy equation file and the compiled kernel are only loaded on first use
+eqns = None
+kernel = None
+derivative_kernel = None
+
+
+def _get_eqns() -> list:
+    global eqns
+    if eqns is None:
+        file = open(os.path.join(base_path, "two_member.pkl"), mode="rb")
+        eqns = pickle_load(file)
+        logger.debug("Joint Equation Files Loaded")
+        file.close()
+    return eqns
+
+
+def _subs(eqns: list, m1: member_type, m2: member_type, theta: float, w: float) -> list:
+    from sympy import symbols
+
+    values = [m1.density, m1.cross_section_area, m1.youngs_modulus, m1.inertia]
+    values.extend([m1.length, m1.height, m2.density, m2.cross_section_area])
+    values.extend([m2.youngs_modulus, m2.inertia, m2.length, m2.height, theta, w])
+    subs_dict = dict(zip(symbols(arguments), values))
+
+    eqns_subs = [None] * len(eqns)
     for i in range(len(eqns)):
         eqns_subs[i] = eqns[i].subs(subs_dict)
         eqns_subs[i].simplify()
     return eqns_subs
 
 
-def _get_soln(eqns: List[Matrix]) -> Tuple[Matrix]:
+def _get_soln(eqns: list) -> tuple:
     M1, M2, M3, M4, M5, M6, N1, N2, N3, N4, N5, N6 = eqns
     logger.debug("M1 :")
     logger.debug(M1)
@@ -81,9 +79,187 @@ def _get_soln(eqns: List[Matrix]) -> Tuple[Matrix]:
 def get_rt_of_two_member(
     m1: member_type, m2: member_type, theta: float, w: float
 ) -> tuple:
-    global eqns
-    eqns_subs = _subs(eqns, m1, m2, theta, w)
+    eqns_subs = _subs(_get_eqns(), m1, m2, theta, w)
     logger.debug("M0-M6 N0-N6 Substituted")
     reflection_transmission = _get_soln(eqns_subs)
     logger.debug("Reflection Transmission Calculated")
     return reflection_transmission
+
+
+def _get_kernel():
+    """Compiles the entries of M1-M6 and N1-N6 into a single vectorised numpy function, this is done only once.
+    It is built from the precompiled numeric form of the equation file, so SymPy is not needed
+    """
+    global kernel
+    if kernel is None:
+        source = load_numeric_equations()["two_member"]["source"]
+        namespace = dict(vars(np))
+        exec(compile(source, "two_member_kernel", "exec"), namespace)
+        kernel = namespace["_lambdifygenerated"]
+        logger.debug("Joint Equations Compiled")
+    return kernel
+
+
+def _get_derivative_kernel():
+    """Compiles the derivatives of the entries of M1-M6 and N1-N6 with respect to omega, see _get_kernel"""
+    global derivative_kernel
+    if derivative_kernel is None:
+        source = load_numeric_equations()["two_member"]["derivative_source"]
+        namespace = dict(vars(np))
+        exec(compile(source, "two_member_derivative_kernel", "exec"), namespace)
+        derivative_kernel = namespace["_lambdifygenerated"]
+        logger.debug("Joint Equation Derivatives Compiled")
+    return derivative_kernel
+
+
+def _evaluate(
+    m1: member_type,
+    m2: member_type,
+    theta: float,
+    w: np.ndarray,
+    derivative: bool = False,
+):
+    """Evaluates M1-M6 and N1-N6, or their derivatives with respect to omega, for an array of omega.
+    The result is shaped (12, n_w, 3, 3)
+    """
+    function = _get_derivative_kernel() if derivative else _get_kernel()
+    # At w = 0 the wave numbers vanish, the resulting inf and nan are handled by the fallback of _solve
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = function(
+            m1.density,
+            m1.cross_section_area,
+            m1.youngs_modulus,
+            m1.inertia,
+            m1.length,
+            m1.height,
+            m2.density,
+            m2.cross_section_area,
+            m2.youngs_modulus,
+            m2.inertia,
+            m2.length,
+            m2.height,
+            theta,
+            w,
+        )
+    matrices = np.empty((len(values), len(w)), dtype=complex)
+    for i, value in enumerate(values):
+        # Constant entries come back as scalars and are broadcast over omega
+        matrices[i] = value
+    return matrices.reshape(-1, 3, 3, len(w)).transpose(0, 3, 1, 2)
+
+
+def _solve(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Solves a stack of systems, the singular ones (e.g. at omega=0) give nan instead of failing the whole stack"""
+    try:
+        return np.linalg.solve(a, b)
+    except np.linalg.LinAlgError:
+        soln = np.full(np.broadcast_shapes(a.shape, b.shape), np.nan, dtype=complex)
+        for i in range(len(a)):
+            try:
+                soln[i] = np.linalg.solve(a[i], b[i])
+            except np.linalg.LinAlgError:
+                logger.debug("Singular joint equations at index %s", i)
+        return soln
+
+
+def _get_soln_numeric(eqns: np.ndarray) -> Tuple[np.ndarray]:
+    """Numeric counterpart of _get_soln, the 3x3 systems are solved for every omega at once"""
+    M1, M2, M3, M4, M5, M6, N1, N2, N3, N4, N5, N6 = eqns
+    solve = _solve
+    transmission_matrix_12 = solve(
+        solve(N5, N4) - solve(N2, N1), solve(N5, N6) - solve(N2, N3)
+    )
+    reflection_matrix_11 = solve(
+        solve(N1, N2) - solve(N4, N5), solve(N4, N6) - solve(N1, N3)
+    )
+    transmission_matrix_21 = solve(
+        solve(M5, M4) - solve(M2, M1), solve(M5, M6) - solve(M2, M3)
+    )
+    reflection_matrix_22 = solve(
+        solve(M1, M2) - solve(M4, M5), solve(M4, M6) - solve(M1, M3)
+    )
+    return (
+        reflection_matrix_11,
+        reflection_matrix_22,
+        transmission_matrix_12,
+        transmission_matrix_21,
+    )
+
+
+def _solve_derivative(a: tuple, b: tuple) -> tuple:
+    """Solves a X = b along with its derivative, a and b being pairs of a value and its derivative.
+    Differentiating a X = b gives a dX = db - da X, which reuses the same a
+    """
+    x = _solve(a[0], b[0])
+    return x, _solve(a[0], b[1] - a[1] @ x)
+
+
+def _subtract(a: tuple, b: tuple) -> tuple:
+    return a[0] - b[0], a[1] - b[1]
+
+
+def _get_soln_derivative_numeric(
+    eqns: np.ndarray, derivatives: np.ndarray
+) -> Tuple[np.ndarray]:
+    """Derivatives of R11, R22, T12 and T21 with respect to omega, carried through the solves of _get_soln_numeric"""
+    M1, M2, M3, M4, M5, M6, N1, N2, N3, N4, N5, N6 = zip(eqns, derivatives)
+    solve, sub = _solve_derivative, _subtract
+    transmission_matrix_12 = solve(
+        sub(solve(N5, N4), solve(N2, N1)), sub(solve(N5, N6), solve(N2, N3))
+    )
+    reflection_matrix_11 = solve(
+        sub(solve(N1, N2), solve(N4, N5)), sub(solve(N4, N6), solve(N1, N3))
+    )
+    transmission_matrix_21 = solve(
+        sub(solve(M5, M4), solve(M2, M1)), sub(solve(M5, M6), solve(M2, M3))
+    )
+    reflection_matrix_22 = solve(
+        sub(solve(M1, M2), solve(M4, M5)), sub(solve(M4, M6), solve(M1, M3))
+    )
+    return (
+        reflection_matrix_11[1],
+        reflection_matrix_22[1],
+        transmission_matrix_12[1],
+        transmission_matrix_21[1],
+    )
+
+
+def get_rt_derivative_of_two_member_numeric(
+    m1: member_type, m2: member_type, theta: float, w: np.ndarray
+) -> tuple:
+    """Gives the derivatives of R11, R22, T12 and T21 with respect to omega for an array of omega, each shaped (n_w, 3, 3)"""
+    w = np.atleast_1d(np.asarray(w, dtype=float))
+    eqns_numeric = _evaluate(m1, m2, theta, w)
+    derivatives_numeric = _evaluate(m1, m2, theta, w, derivative=True)
+    derivatives = _get_soln_derivative_numeric(eqns_numeric, derivatives_numeric)
+    logger.debug("Reflection Transmission Derivatives Calculated")
+    return derivatives
+
+
+def get_rt_of_two_member_numeric(
+    m1: member_type,
+    m2: member_type,
+    theta: float,
+    w: np.ndarray,
+    cache: disk_cache = None,
+) -> tuple:
+    """Gives R11, R22, T12 and T21 for an array of omega, each shaped (n_w, 3, 3)
+    With a disk cache the results of a grid chunk are looked up by the member properties, theta and omega before solving.
+    Single omega, such as the evaluations of a root refinement, are never seen again so they are not cached on disk
+    """
+    w = np.atleast_1d(np.asarray(w, dtype=float))
+    if len(w) == 1:
+        cache = None
+    if cache is not None:
+        key = cache.get_key(
+            [get_member_properties(m1), get_member_properties(m2), [theta], w]
+        )
+        stacked = cache.get(key)
+        if stacked is not None:
+            return tuple(stacked)
+    eqns_numeric = _evaluate(m1, m2, theta, w)
+    reflection_transmission = _get_soln_numeric(eqns_numeric)
+    logger.debug("Reflection Transmission Calculated")
+    if cache is not None:
+        cache.put(key, np.stack(reflection_transmission))
+    return reflection_transmission
@@ -0,0 +1,55 @@
+from typing import Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+# Functions of the coefficient matrix whose roots are the natural frequencies
+OBJECTIVES = ["det", "svd"]
+
+
+def equilibrate(matrices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Scales the rows and then the columns of the matrices so that their largest entries are 1.
+    The evanescent terms make entries differ by many orders of magnitude, which this removes.
+    Gives the scaled matrices and the log of the factors taken out, i.e. log|det A| = log|det scaled| + log_scale
+    """
+    row_scale = np.abs(matrices).max(axis=-1)
+    row_scale[~(row_scale > 0)] = 1
+    scaled = matrices / row_scale[..., np.newaxis]
+    col_scale = np.abs(scaled).max(axis=-2)
+    col_scale[~(col_scale > 0)] = 1
+    scaled = scaled / col_scale[..., np.newaxis, :]
+    log_scale = np.log(row_scale).sum(axis=-1) + np.log(col_scale).sum(axis=-1)
+    return scaled, log_scale
+
+
+def get_log_determinant(matrices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sign and log of the absolute value of the determinant, computed on the equilibrated matrices so it neither overflows nor underflows"""
+    scaled, log_scale = equilibrate(matrices)
+    with np.errstate(invalid="ignore"):
+        sign, logdet = np.linalg.slogdet(scaled)
+    return sign, logdet + log_scale
+
+
+def get_singular_indicator(matrices: np.ndarray) -> np.ndarray:
+    """Ratio of the smallest to the largest singular value of the equilibrated matrices times the phase of the determinant.
+    It lies between 0 and 1, goes to 0 linearly at the natural frequencies and flips phase there like the determinant,
+    but unlike the determinant it does not underflow on frames with many members
+    """
+    scaled, _ = equilibrate(matrices)
+    finite = np.isfinite(scaled).all(axis=(-2, -1))
+    indicator = np.full(finite.shape, np.nan, dtype=complex)
+    sign, _ = np.linalg.slogdet(scaled[finite])
+    singular_values = np.linalg.svd(scaled[finite], compute_uv=False)
+    indicator[finite] = sign * singular_values[..., -1] / singular_values[..., 0]
+    return indicator
+
+
+def get_objective(matrices: np.ndarray, objective: str = "det") -> np.ndarray:
+    """Evaluates the chosen objective on a matrix or a stack of matrices, matrices with nan entries (e.g. at omega=0) give nan"""
+    if objective == "det":
+        with np.errstate(invalid="ignore"):
+            return np.linalg.det(matrices)
+    if objective == "svd":
+        return get_singular_indicator(matrices)
+    raise ValueError(f"objective must be one of {OBJECTIVES}")
@@ -0,0 +1,205 @@
+from typing import Callable
+import numpy as np
+import logging
+import struct
+import os
+
+logger = logging.getLogger("acoustic_analyser")
+
+# Record written for every frequency of a sweep
+RECORD = np.dtype([("frequency", float), ("determinant", complex)])
+# Size of the .npy header, fixed so that it can be rewritten in place as the file grows
+HEADER_SIZE = 128
+
+
+def get_records(freq: np.ndarray, output: np.ndarray) -> np.ndarray:
+    records = np.empty(len(freq), dtype=RECORD)
+    records["frequency"] = freq
+    records["determinant"] = output
+    return records
+
+
+class sink:
+    """This class is the interface of the consumers of a frequency sweep, see frame.sweep.
+    open is called with the total number of frequencies before any write, and the sinks which can resume
+    report how many frequencies they already hold through get_written_count
+    """
+
+    def open(self, total: int, resume: bool = False) -> None:
+        pass
+
+    def get_written_count(self) -> int:
+        """None if the sink cannot resume"""
+        return None
+
+    def truncate(self, count: int) -> None:
+        pass
+
+    def write(self, freq: np.ndarray, output: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class callback_sink(sink):
+    """Calls func(freq, output) for every chunk"""
+
+    def __init__(self, func: Callable[[np.ndarray, np.ndarray], None]) -> None:
+        self.func = func
+
+    def write(self, freq: np.ndarray, output: np.ndarray) -> None:
+        self.func(freq, output)
+
+
+class memmap_sink(sink):
+    """Writes into a memory mapped .npy file of RECORD holding the whole sweep.
+    Frequencies not written yet are nan, which is how an interrupted sweep is resumed
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.records = None
+        self.count = 0
+
+    def open(self, total: int, resume: bool = False) -> None:
+        if resume and os.path.exists(self.path):
+            self.records = np.lib.format.open_memmap(self.path, mode="r+")
+            if self.records.dtype != RECORD or self.records.shape != (total,):
+                raise ValueError(
+                    f"{self.path} does not hold a sweep of {total} frequencies"
+                )
+            written = np.isnan(self.records["frequency"])
+            self.count = int(written.argmax()) if written.any() else total
+        else:
+            self.records = np.lib.format.open_memmap(
+                self.path, mode="w+", dtype=RECORD, shape=(total,)
+            )
+            self.records["frequency"] = np.nan
+            self.count = 0
+
+    def get_written_count(self) -> int:
+        return self.count
+
+    def truncate(self, count: int) -> None:
+        self.records["frequency"][count:] = np.nan
+        self.count = count
+
+    def write(self, freq: np.ndarray, output: np.ndarray) -> None:
+        self.records[self.count : self.count + len(freq)] = get_records(freq, output)
+        self.count = self.count + len(freq)
+        self.records.flush()
+
+    def close(self) -> None:
+        if self.records is not None:
+            self.records.flush()
+            self.records = None
+
+
+class npy_sink(sink):
+    """Appends RECORD to a .npy file, the header is rewritten after every chunk so the file is always loadable with np.load"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = None
+        self.count = 0
+
+    def _write_header(self) -> None:
+        header = repr(
+            {
+                "descr": np.lib.format.dtype_to_descr(RECORD),
+                "fortran_order": False,
+                "shape": (self.count,),
+            }
+        )
+        header = header + " " * (HEADER_SIZE - 10 - len(header) - 1) + "\n"
+        self.file.seek(0)
+        self.file.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)))
+        self.file.write(header.encode("latin1"))
+
+    def open(self, total: int, resume: bool = False) -> None:
+        if resume and os.path.exists(self.path):
+            self.file = open(self.path, "r+b")
+            np.lib.format.read_magic(self.file)
+            shape, _, dtype = np.lib.format.read_array_header_1_0(self.file)
+            if dtype != RECORD:
+                raise ValueError(f"{self.path} does not hold a sweep")
+            # Records of a chunk cut short by the interruption are dropped
+            size = os.path.getsize(self.path) - HEADER_SIZE
+            self.count = min(shape[0], size // RECORD.itemsize)
+        else:
+            self.file = open(self.path, "w+b")
+            self.count = 0
+            self._write_header()
+
+    def get_written_count(self) -> int:
+        return self.count
+
+    def truncate(self, count: int) -> None:
+        self.count = count
+        self.file.truncate(HEADER_SIZE + count * RECORD.itemsize)
+        self._write_header()
+        self.file.flush()
+
+    def write(self, freq: np.ndarray, output: np.ndarray) -> None:
+        self.file.seek(HEADER_SIZE + self.count * RECORD.itemsize)
+        self.file.write(get_records(freq, output).tobytes())
+        self.count = self.count + len(freq)
+        self._write_header()
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class csv_sink(sink):
+    """Appends the frequency and the real and imaginary parts of the determinant to a CSV file"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file = None
+        self.count = 0
+
+    def _cut(self, count: int = None) -> None:
+        """Cuts the file after the header and count complete lines, all the complete lines if count is None"""
+        with open(self.path, "rb") as file:
+            content = file.read()
+        ends = np.flatnonzero(np.frombuffer(content, dtype=np.uint8) == ord("\n"))
+        lines = ends[1:] if count is None else ends[1 : count + 1]
+        self.count = len(lines)
+        with open(self.path, "r+b") as file:
+            file.truncate(int(lines[-1] if len(lines) else ends[0]) + 1)
+
+    def open(self, total: int, resume: bool = False) -> None:
+        if resume and os.path.exists(self.path):
+            # A line cut short by the interruption is dropped
+            self._cut()
+        else:
+            with open(self.path, "w") as file:
+                file.write("frequency,real,imag\n")
+            self.count = 0
+        self.file = open(self.path, "a")
+
+    def get_written_count(self) -> int:
+        return self.count
+
+    def truncate(self, count: int) -> None:
+        self.file.close()
+        self._cut(count)
+        self.file = open(self.path, "a")
+
+    def write(self, freq: np.ndarray, output: np.ndarray) -> None:
+        output = np.asarray(output, dtype=complex)
+        self.file.writelines(
+            f"{f!r},{d.real!r},{d.imag!r}\n"
+            for f, d in zip(freq.tolist(), output.tolist())
+        )
+        self.count = self.count + len(freq)
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
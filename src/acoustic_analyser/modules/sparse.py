@@ -0,0 +1,108 @@
+from typing import Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger("acoustic_analyser")
+
+
+class sparse_pattern:
+    """This class holds the CSC sparsity pattern of the coefficient matrix, which is fixed by the topology.
+    It is computed once from the positions of the entries and maps every entry to its slot in the CSC data array,
+    so a matrix for a new omega only needs its values to be scattered into the data array
+    """
+
+    def __init__(self, rows: np.ndarray, cols: np.ndarray, size: int) -> None:
+        order = np.lexsort((rows, cols))
+        sorted_rows, sorted_cols = rows[order], cols[order]
+        duplicate = (sorted_rows[1:] == sorted_rows[:-1]) & (
+            sorted_cols[1:] == sorted_cols[:-1]
+        )
+        if np.any(duplicate):
+            raise Exception("Two blocks of the coefficient matrix overlap")
+
+        self.size = size
+        self.indices = sorted_rows
+        self.indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(cols, minlength=size))]
+        )
+        # Slot in the data array of every entry, in the order the entries were given
+        self.positions = np.empty(len(order), dtype=int)
+        self.positions[order] = np.arange(len(order))
+        logger.debug("Sparse pattern with %s entries for size %s", len(order), size)
+
+    def get_matrix(self, values: np.ndarray):
+        """Builds the CSC matrix from the values of the entries, in the order the entries were given"""
+        from scipy.sparse import csc_matrix
+
+        data = np.empty(len(self.positions), dtype=complex)
+        data[self.positions] = values
+        return csc_matrix(
+            (data, self.indices, self.indptr), shape=(self.size, self.size)
+        )
+
+
+def get_permutation_sign(permutation: np.ndarray) -> int:
+    """Sign of a permutation from the parity of its cycles"""
+    visited = np.zeros(len(permutation), dtype=bool)
+    sign = 1
+    for start in range(len(permutation)):
+        if visited[start]:
+            continue
+        length = 0
+        index = start
+        while not visited[index]:
+            visited[index] = True
+            index = permutation[index]
+            length = length + 1
+        if length % 2 == 0:
+            sign = -sign
+    return sign
+
+
+def get_sparse_log_determinant(matrix) -> Tuple[complex, float]:
+    """Sign and log of the absolute value of the determinant of a sparse matrix, as with np.linalg.slogdet.
+    It is taken from the diagonal of U of the sparse LU factorisation, L having a unit diagonal, and the signs of the row and column permutations
+    """
+    from scipy.sparse.linalg import splu
+
+    try:
+        lu = splu(matrix)
+    except RuntimeError:
+        # SuperLU refuses exactly singular matrices
+        return 0j, -np.inf
+    diagonal = lu.U.diagonal()
+    magnitude = np.abs(diagonal)
+    sign = np.prod(diagonal / magnitude)
+    sign = sign * get_permutation_sign(lu.perm_r) * get_permutation_sign(lu.perm_c)
+    return sign, np.sum(np.log(magnitude))
+
+
+def get_sparse_singular_indicator(matrix, iterations: int = 8) -> float:
+    """Estimate of the ratio of the smallest to the largest singular value of the equilibrated sparse matrix,
+    the sparse counterpart of scaling.get_singular_indicator without its phase.
+    The smallest singular value is found by inverse iteration with the sparse LU factors and the largest by power iteration
+    """
+    from scipy.sparse import diags
+    from scipy.sparse.linalg import splu
+
+    matrix = matrix.tocsr()
+    row_scale = abs(matrix).max(axis=1).toarray().ravel()
+    row_scale[~(row_scale > 0)] = 1
+    scaled = diags(1 / row_scale) @ matrix
+    col_scale = abs(scaled).max(axis=0).toarray().ravel()
+    col_scale[~(col_scale > 0)] = 1
+    scaled = (scaled @ diags(1 / col_scale)).tocsc()
+    try:
+        lu = splu(scaled)
+    except RuntimeError:
+        return 0.0
+
+    start = np.random.default_rng(0).standard_normal(scaled.shape[0]) + 0j
+    smallest = start / np.linalg.norm(start)
+    largest = smallest.copy()
+    for _ in range(iterations):
+        smallest = lu.solve(lu.solve(smallest, trans="H"))
+        smallest = smallest / np.linalg.norm(smallest)
+        largest = scaled.conj().T @ (scaled @ largest)
+        largest = largest / np.linalg.norm(largest)
+    return np.linalg.norm(scaled @ smallest) / np.linalg.norm(scaled @ largest)